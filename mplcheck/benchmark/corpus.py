@@ -0,0 +1,168 @@
+#    Copyright (c) 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import zipfile
+
+NAMESPACE = 'com.example.bench'
+
+MANIFEST = """Format: MuranoPL/1.3
+Type: Application
+FullName: {namespace}.App
+Name: Benchmark application
+Description: Package generated by mplcheck.benchmark.corpus
+Author: mplcheck
+Tags: [benchmark]
+Classes:
+{classes}
+UI: ui.yaml
+"""
+
+CLASS = """Namespaces:
+  =: {namespace}
+  std: io.murano
+  res: io.murano.resources
+Name: {name}
+Extends: std:Application
+Properties:
+  name:
+    Contract: $.string().notNull()
+  instance:
+    Contract: $.class(res:Instance).notNull()
+  counter:
+    Contract: $.int()
+    Default: 0
+    Usage: InOut
+  items:
+    Contract: [$.string()]
+    Default: []
+Methods:
+{methods}
+"""
+
+METHOD = """  {name}:
+    Arguments:
+      - value:
+          Contract: $.string().notNull()
+      - limit:
+          Contract: $.int().check($ >= 0)
+          Default: 10
+    Body:
+{body}
+"""
+
+FORM = """  - group{index}:
+      fields:
+        - name: name{index}
+          type: string
+          label: Name
+          required: true
+          description: Name of the instance
+        - name: flavor{index}
+          type: flavor
+          label: Flavor
+          required: false
+          hidden: false
+        - name: count{index}
+          type: integer
+          label: Count
+          description: Number of instances
+"""
+
+UI = """Version: 2
+Application:
+  ?:
+    type: {namespace}.Class0
+  name: $.group0.name0
+Forms:
+{forms}"""
+
+
+def _indent(lines, depth):
+    return ['  ' * depth + line for line in lines]
+
+
+def code_block(depth):
+    """Lines of a method body with nested If/For blocks depth deep"""
+    lines = [
+        "- $.counter: $.counter + 1",
+        "- $.instance.deploy()",
+        "- $.items: $.items.append($value)",
+        "- $.log('Deploying {0} at {1}', $value, $.counter)",
+    ]
+    if depth > 0:
+        lines.append("- If: $.counter > $limit")
+        lines.append("  Then:")
+        lines.extend(_indent(code_block(depth - 1), 2))
+        lines.append("  Else:")
+        lines.append("    - Return: $.counter")
+        lines.append("- For: item")
+        lines.append("  In: $.items.where($ != null).select($.trim())")
+        lines.append("  Do:")
+        lines.append("    - $.log($item)")
+    else:
+        lines.append("- Return: $.items.len()")
+    return lines
+
+
+def class_name(index):
+    return 'Class{0}'.format(index)
+
+
+def class_file(index, methods, depth):
+    body = '\n'.join(_indent(code_block(depth), 3))
+    return CLASS.format(
+        namespace=NAMESPACE, name=class_name(index),
+        methods=''.join(METHOD.format(name='method{0}'.format(i), body=body)
+                        for i in range(methods)))
+
+
+def package_files(classes=10, methods=5, depth=3, forms=2):
+    """Returns a dict mapping file names of a package to their content"""
+    files = {}
+    class_lines = []
+    for index in range(classes):
+        filename = '{0}.yaml'.format(class_name(index))
+        class_lines.append('  {0}.{1}: {2}'.format(
+            NAMESPACE, class_name(index), filename))
+        files['Classes/' + filename] = class_file(index, methods, depth)
+    files['manifest.yaml'] = MANIFEST.format(
+        namespace=NAMESPACE, classes='\n'.join(class_lines))
+    if forms:
+        files['UI/ui.yaml'] = UI.format(
+            namespace=NAMESPACE,
+            forms=''.join(FORM.format(index=i) for i in range(forms)))
+    return files
+
+
+def generate(path, classes=10, methods=5, depth=3, forms=2, archive=False):
+    """Writes a package to path, a directory or, with archive, a zip file
+
+    Content only depends on the arguments, so numbers measured on
+    packages generated on different hosts are comparable.
+    """
+    files = package_files(classes, methods, depth, forms)
+    if archive:
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zip_:
+            for name in sorted(files):
+                zip_.writestr(name, files[name])
+        return path
+    for name, content in files.items():
+        filename = os.path.join(path, name)
+        dirname = os.path.dirname(filename)
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        with open(filename, 'w') as file_:
+            file_.write(content)
+    return path
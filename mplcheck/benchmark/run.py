@@ -0,0 +1,176 @@
+#    Copyright (c) 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import tempfile
+import timeit
+
+import six
+
+from mplcheck.benchmark import corpus
+from mplcheck.checkers import yaql_checker
+from mplcheck import consts
+from mplcheck import manager
+from mplcheck import pkg_loader
+from mplcheck import version
+
+
+def _measure(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        func()
+        times.append(timeit.default_timer() - start)
+    times.sort()
+    return {'best': times[0], 'median': times[len(times) // 2]}
+
+
+def _yaml_files(pkg):
+    return [name for name in pkg.list_files()
+            if name.endswith(consts.YAML_EXTENSIONS)]
+
+
+def _expressions(pkg):
+    def walk(data):
+        if isinstance(data, dict):
+            for key, value in data.items():
+                for expression in walk(key):
+                    yield expression
+                for expression in walk(value):
+                    yield expression
+        elif isinstance(data, list):
+            for item in data:
+                for expression in walk(item):
+                    yield expression
+        elif isinstance(data, six.string_types) and data.startswith('$'):
+            yield data[:]
+
+    expressions = []
+    for name in _yaml_files(pkg):
+        for document in pkg.read(name).yaml() or ():
+            expressions.extend(walk(document))
+    return expressions
+
+
+def benchmarks(path):
+    """Returns (name, function) pairs timed over the package at path"""
+    pkg = pkg_loader.load_package(path)
+    yaml_files = _yaml_files(pkg)
+    expressions = _expressions(pkg)
+    checker = yaql_checker.YaqlChecker()
+
+    def parse_yaml():
+        fresh = pkg_loader.load_package(path)
+        for name in yaml_files:
+            fresh.read(name).yaml()
+
+    def parse_yaql():
+        for expression in expressions:
+            checker._check(expression)
+
+    def check_yaql():
+        for expression in expressions:
+            checker(expression)
+
+    def validate():
+        manager.Manager(path).validate()
+
+    return [
+        ('load_package', lambda: pkg_loader.load_package(path)),
+        ('yaml parsing', parse_yaml),
+        ('yaql parsing', parse_yaql),
+        ('yaql checker (cached)', check_yaql),
+        ('validate', validate),
+    ]
+
+
+def run_benchmarks(options):
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp_dir, 'package')
+        if options.zip:
+            path += '.zip'
+        corpus.generate(path, classes=options.classes,
+                        methods=options.methods, depth=options.depth,
+                        forms=options.forms, archive=options.zip)
+        manager.warm_up()
+        results = []
+        for name, func in benchmarks(path):
+            func()
+            results.append((name, _measure(func, options.repeat)))
+        return results
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def parse_cli_args(args=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmarks mpl-check over a generated package',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--classes', type=int, default=20,
+                        help='number of classes in the package')
+    parser.add_argument('--methods', type=int, default=10,
+                        help='number of methods of each class')
+    parser.add_argument('--depth', type=int, default=3,
+                        help='nesting depth of method bodies')
+    parser.add_argument('--forms', type=int, default=5,
+                        help='number of UI forms')
+    parser.add_argument('--zip', action='store_true',
+                        help='pack the package into a zip archive')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='number of times each benchmark is run')
+    parser.add_argument('--json', action='store_true',
+                        help='print results as JSON')
+    return parser.parse_args(args=args)
+
+
+def _mplcheck_version():
+    # NOTE: pbr fails when mplcheck is neither installed nor run from a
+    # git checkout, e.g. from a copied tree
+    try:
+        return version.version_info.version_string()
+    except Exception:
+        return 'unknown'
+
+
+def main(args=None):
+    options = parse_cli_args(args)
+    # NOTE: logged checker failures would be measured too
+    logging.disable(logging.CRITICAL)
+    results = run_benchmarks(options)
+    if options.json:
+        print(json.dumps({
+            'options': vars(options),
+            'python': platform.python_version(),
+            'mplcheck': _mplcheck_version(),
+            'mplcheck_source': version.source_fingerprint(),
+            'results': dict(results),
+        }, indent=2, sort_keys=True))
+        return
+    print('python {0}, mplcheck {1} ({2})'.format(
+        platform.python_version(), _mplcheck_version(),
+        version.source_fingerprint()[:12]))
+    print('{0:<24}{1:>12}{2:>12}'.format('benchmark', 'best, s', 'median, s'))
+    for name, result in results:
+        print('{0:<24}{1:>12.4f}{2:>12.4f}'.format(name, result['best'],
+                                                   result['median']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#    Copyright (c) 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+
+from mplcheck.benchmark import corpus
+
+
+def _measure(command, repeat):
+    times = []
+    with open(os.devnull, 'w') as devnull:
+        for _ in range(repeat):
+            start = timeit.default_timer()
+            subprocess.check_call(command, stdout=devnull)
+            times.append(timeit.default_timer() - start)
+    times.sort()
+    return times[0], times[len(times) // 2]
+
+
+def commands(pkg_path, cache_dir):
+    """Returns (name, command) pairs started in a fresh interpreter"""
+    run = [sys.executable, '-m', 'mplcheck.cmd.run', '--jobs', '1']
+    return [
+        ('interpreter', [sys.executable, '-c', 'pass']),
+        ('import', [sys.executable, '-c', 'import mplcheck.cmd.run']),
+        ('help', run + ['--help']),
+        ('tiny package', run + [pkg_path]),
+        ('tiny package, cached', run + ['--cache-dir', cache_dir, pkg_path]),
+    ]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='Measures start up time of mpl-check',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10,
+                        help='number of times each command is run')
+    options = parser.parse_args(args=args)
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        pkg_path = corpus.generate(os.path.join(tmp_dir, 'package'),
+                                   classes=1, methods=1, depth=1, forms=1)
+        cache_dir = os.path.join(tmp_dir, 'cache')
+        print('{0:<24}{1:>12}{2:>12}'.format('command', 'best, s',
+                                             'median, s'))
+        for name, command in commands(pkg_path, cache_dir):
+            # NOTE: the first run fills the plugin and result caches
+            _measure(command, 1)
+            best, median = _measure(command, options.repeat)
+            print('{0:<24}{1:>12.4f}{2:>12.4f}'.format(name, best, median))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
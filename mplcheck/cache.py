@@ -0,0 +1,128 @@
+#    Copyright (c) 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import errno
+import hashlib
+import os
+import tempfile
+
+import six
+from six.moves import cPickle as pickle
+
+from mplcheck import log
+from mplcheck import version
+
+LOG = log.get_logger(__name__)
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+ENTRY_SUFFIX = '.pickle'
+
+
+def _to_bytes(value):
+    if isinstance(value, six.text_type):
+        return value.encode('utf-8')
+    return value
+
+
+class DiskCache(object):
+    """Content addressed cache of pickled objects shared between runs
+
+    Entries are written to a temporary file and renamed into place, so
+    several processes can use the same directory concurrently. When the
+    directory grows over max_size the least recently used entries are
+    removed.
+    """
+
+    def __init__(self, path, max_size=DEFAULT_MAX_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self._version = _to_bytes(version.source_fingerprint())
+        self._written = 0
+
+    def key(self, *parts):
+        digest = hashlib.sha1(self._version)
+        for part in parts:
+            digest.update(b'\0')
+            digest.update(_to_bytes(part))
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, key[:2], key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as file_:
+                value = pickle.load(file_)
+        except (IOError, OSError):
+            return None
+        except Exception:
+            LOG.debug('Broken cache entry %s', path)
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return value
+
+    def set(self, key, value):
+        path = self._entry_path(key)
+        dirname = os.path.dirname(path)
+        try:
+            os.makedirs(dirname)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                LOG.debug('Cannot create cache directory %s: %s', dirname, e)
+                return
+        fd, tmp_path = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file_:
+                pickle.dump(value, file_, pickle.HIGHEST_PROTOCOL)
+                size = file_.tell()
+            os.rename(tmp_path, path)
+        except Exception as e:
+            LOG.debug('Cannot write cache entry %s: %s', path, e)
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+        self._written += size
+        if self._written > self.max_size // 16:
+            self._written = 0
+            self.evict()
+
+    def _entries(self):
+        for dirpath, dirnames, filenames in os.walk(self.path):
+            for filename in filenames:
+                if not filename.endswith(ENTRY_SUFFIX):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+
+    def evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            total -= size
@@ -18,6 +18,9 @@ from mplcheck.checkers import yaql_checker
 from mplcheck import error
 
 
+CODES = ('E200', 'E201', 'E202', 'E203')
+
+
 def check_req(check, required=True):
     return locals()
 
@@ -80,7 +83,8 @@ CODE_STRUCTURE = {
 
 
 class CheckCodeStructure(object):
-    def __init__(self):
+    def __init__(self, code_filter=None):
+        self.code_filter = code_filter or error.CodeFilter()
         self._check_mappings = {
             'codeblock': self.codeblock,
             'predicate': self.yaql,
@@ -91,21 +95,27 @@ class CheckCodeStructure(object):
         }
         self._yaql_checker = yaql_checker.YaqlChecker()
 
+    @error.emits('E203')
     def string(self, value):
         if not isinstance(value, six.string_types):
             yield error.report.E203('Value should be string type '
-                                    '"{0}"'.format(value), value)
+                                    '"{0}"', value, args=(value,))
 
+    @error.emits('E200')
     def empty(self, value):
         if value:
             yield error.report.E200('There should be no value here '
-                                    '"{0}"'.format(value), value)
+                                    '"{0}"', value, args=(value,))
 
+    @error.emits('E202')
     def yaql(self, value):
+        if not self.code_filter('E202'):
+            return
         if not self._yaql_checker(value):
             yield error.report.E202('Not a valid yaql expression '
-                                    '"{0}"'.format(value), value)
+                                    '"{0}"', value, args=(value,))
 
+    @error.emits(*CODES)
     def codeblock(self, codeblocks):
         if isinstance(codeblocks, six.string_types):
             yield self._single_block(codeblocks)
@@ -115,25 +125,29 @@ class CheckCodeStructure(object):
         else:
             yield self._single_block(codeblocks)
 
+    @error.emits('E201', 'E202')
     def _check_assigment(self, block):
         key = block.keys()[0]
         if not isinstance(key, six.string_types) or not key.startswith('$'):
             yield error.report.E201('Not valid variable name '
-                                    '"{0}"'.format(key), key)
+                                    '"{0}"', key, args=(key,))
 
         value = block.values()[0]
         if isinstance(value, six.string_types):
             yield self.yaql(value)
 
+    @error.emits(*CODES)
     def _single_block(self, block):
         if isinstance(block, dict):
             yield self._check_structure(block)
         elif isinstance(block, six.string_types):
             yield self.yaql(block)
 
+    @error.emits(*CODES)
     def _run_check(self, check, value):
         yield self._check_mappings[check](value)
 
+    @error.emits(*CODES)
     def _check_structure(self, block):
         block_keys = block.keys()
         for key, value in six.iteritems(CODE_STRUCTURE):
@@ -153,11 +167,11 @@ class CheckCodeStructure(object):
         for missing in (kset - block_keys_set):
             if keywords[missing]['required']:
                 yield error.report.E200('Missing keyword "{0}" for "{1}" '
-                                        'code structure'
-                                        .format(missing, key), key)
+                                        'code structure', key,
+                                        args=(missing, key))
         for unknown in (block_keys_set - kset - set([key])):
-            yield error.report.E201('Unknown keyword "{0}" in "While"'
-                                    .format(unknown), unknown)
+            yield error.report.E201('Unknown keyword "{0}" in "While"',
+                                    unknown, args=(unknown,))
         for ckey, cvalue in six.iteritems(keywords):
             check = cvalue['check']
             data = block.get(ckey)
@@ -28,9 +28,7 @@ class NamespaceChecker(object):
             class_path = namespace + '.' + name
             fname = self._manifest_classes.get(class_path)
             if not fname:
-                yield error.report.S010('Namespace of class "{class_}" in '
-                                        '"{class_namespace}" doesn\'t match '
-                                        'namespace provided in Manifest'
-                                        .format(class_=name,
-                                                class_namespace=class_path),
-                                        fname)
+                yield error.report.S010('Namespace of class "{0}" in '
+                                        '"{1}" doesn\'t match '
+                                        'namespace provided in Manifest',
+                                        fname, args=(name, class_path))
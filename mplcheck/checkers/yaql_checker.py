@@ -12,8 +12,14 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import yaql
+import collections
+import threading
 
+import six
+
+from mplcheck import profiler
+
+CACHE_SIZE = 4096
 ITERATORS_LIMIT = 100
 EXPRESSION_MEMORY_QUOTA = 512*1024
 
@@ -34,6 +40,7 @@ ENGINE_12_OPTIONS = {
 
 
 def _add_operators(engine_factory):
+    import yaql
     engine_factory.insert_operator(
         '>', True, 'is',
         yaql.factory.OperatorType.BINARY_LEFT_ASSOCIATIVE, False)
@@ -46,21 +53,83 @@ def _add_operators(engine_factory):
     engine_factory.operators.insert(0, ())
 
 
-def _create_engine():
+def _create_engine(options):
+    # NOTE: yaql is slow to import and is not needed at all when results
+    # come from the cache
+    import yaql
     engine_factory = yaql.factory.YaqlFactory()
     _add_operators(engine_factory=engine_factory)
-    options = ENGINE_12_OPTIONS
     return engine_factory.create(options=options)
 
 
+_ENGINES = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+def _options_key(options):
+    return tuple(sorted(options.items()))
+
+
+def get_engine(options=ENGINE_12_OPTIONS):
+    key = _options_key(options)
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(key)
+        if engine is None:
+            engine = _ENGINES[key] = _create_engine(options)
+        return engine
+
+
+class _LRUCache(object):
+
+    def __init__(self, size):
+        self._size = size
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.pop(key, default)
+            if value is not default:
+                self._data[key] = value
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            if len(self._data) > self._size:
+                self._data.popitem(last=False)
+
+
+_RESULTS = {}
+
+
 class YaqlChecker(object):
-    def __init__(self):
-        self._engine = _create_engine()
+    def __init__(self, options=ENGINE_12_OPTIONS):
+        self._options = options
+        self._engine = None
+        self._results = _RESULTS.setdefault(_options_key(options),
+                                            _LRUCache(CACHE_SIZE))
 
     def __call__(self, data):
+        if not isinstance(data, six.string_types):
+            return self._check(data)
+        # NOTE: slicing drops YamlString metadata from the cache key
+        expression = data[:]
+        result = self._results.get(expression)
+        if result is None:
+            result = self._check(expression)
+            self._results.set(expression, result)
+        return result
+
+    def _check(self, data):
+        from yaql.language import exceptions
+        profiler.count('yaql parses')
+        if self._engine is None:
+            self._engine = get_engine(self._options)
         try:
             self._engine(data)
-        except yaql.utils.exceptions.YaqlParsingException:
+        except exceptions.YaqlParsingException:
             return False
         except TypeError:
             return False
@@ -13,16 +13,25 @@
 #    under the License.
 
 import argparse
+import cProfile
+import logging
+import multiprocessing
+import sys
 
+from mplcheck import cache
 from mplcheck import log
 from mplcheck import manager
+from mplcheck import pkg_loader
+from mplcheck import profiler
+from mplcheck import server
+from mplcheck import watch
 
 LOG = log.get_logger(__name__)
 
 
 def parse_cli_args(args=None):
 
-    usage_string = 'mpl-check [options] <path to package>'
+    usage_string = 'mpl-check [options] <path to package> [<path> ...]'
 
     parser = argparse.ArgumentParser(
         description='murano-pkg-checker arguments',
@@ -42,17 +51,167 @@ def parse_cli_args(args=None):
                         type=str,
                         help='skip errors and warnings (e.g. E042,W007)')
 
+    parser.add_argument('--stream',
+                        dest='stream',
+                        action='store_true',
+                        help='print errors of a package as they are found '
+                             'instead of sorted by code once validation '
+                             'is finished')
+
+    parser.add_argument('--catalog',
+                        dest='catalog',
+                        action='store_true',
+                        help='validate every directory and archive found '
+                             'in the given directories as a package')
+
+    parser.add_argument('--cache-dir',
+                        dest='cache_dir',
+                        required=False,
+                        type=str,
+                        help='directory to keep parsed YAML files and '
+                             'validation results between '
+                             'runs (disabled by default)')
+
+    parser.add_argument('--cache-size',
+                        dest='cache_size',
+                        required=False,
+                        type=int,
+                        default=cache.DEFAULT_MAX_SIZE // (1024 * 1024),
+                        help='maximum size of the cache directory in MB')
+
+    parser.add_argument('--memory-budget',
+                        dest='memory_budget',
+                        required=False,
+                        type=int,
+                        default=pkg_loader.DEFAULT_MEMORY_BUDGET // (
+                            1024 * 1024),
+                        help='maximum memory in MB taken by files read from '
+                             'a package and their parsed YAML')
+
+    parser.add_argument('--jobs', '-j',
+                        dest='jobs',
+                        required=False,
+                        type=int,
+                        default=multiprocessing.cpu_count(),
+                        help='number of worker processes used to validate '
+                             'several packages')
+
+    parser.add_argument('--validator-jobs',
+                        dest='validator_jobs',
+                        required=False,
+                        type=int,
+                        default=1,
+                        help='number of workers used to check files of '
+                             'a single package')
+
+    parser.add_argument('--validator-executor',
+                        dest='validator_executor',
+                        required=False,
+                        choices=[manager.PROCESS_EXECUTOR,
+                                 manager.THREAD_EXECUTOR],
+                        default=manager.PROCESS_EXECUTOR,
+                        help='kind of workers used with --validator-jobs')
+
+    parser.add_argument('--parse-jobs',
+                        dest='parse_jobs',
+                        required=False,
+                        type=int,
+                        default=1,
+                        help='number of processes used to parse YAML files '
+                             'of a single package before it is validated')
+
+    parser.add_argument('--serve',
+                        dest='serve',
+                        required=False,
+                        type=str,
+                        metavar='SOCKET',
+                        help='keep running and validate packages requested '
+                             'over a Unix socket')
+
+    parser.add_argument('--watch',
+                        dest='watch',
+                        required=False,
+                        type=str,
+                        metavar='DIR',
+                        help='keep running and revalidate a package '
+                             'directory every time its files change')
+
+    parser.add_argument('--watch-interval',
+                        dest='watch_interval',
+                        required=False,
+                        type=float,
+                        default=watch.DEFAULT_INTERVAL,
+                        help='seconds between checks for changed files')
+
+    parser.add_argument('--profile',
+                        dest='profile',
+                        action='store_true',
+                        help='print time spent in each validator and '
+                             'checker to stderr, validation runs in a '
+                             'single process')
+
+    parser.add_argument('--profile-dump',
+                        dest='profile_dump',
+                        required=False,
+                        type=str,
+                        metavar='FILE',
+                        help='write cProfile statistics of the run to FILE, '
+                             'validation runs in a single process')
+
+    parser.add_argument('--debug',
+                        dest='debug',
+                        action='store_true',
+                        help='log debug messages to stderr')
+
     parser.add_argument('pkg_path',
                         type=str,
-                        help='Path to package')
+                        nargs='*',
+                        help='Path to package or to a directory with '
+                             'packages')
 
-    return parser.parse_args(args=args)
+    parsed = parser.parse_args(args=args)
+    if not (parsed.pkg_path or parsed.serve or parsed.watch):
+        parser.error('at least one package path is required')
+    return parsed
 
 
 def run():
     args = parse_cli_args()
-    m = manager.Manager(args.pkg_path)
-    m.load_plugins()
+    log.setup(logging.DEBUG if args.debug else log.DEFAULT_LEVEL)
+    if not (args.profile or args.profile_dump):
+        _run(args)
+        return
+    # NOTE: statistics are only gathered in this process
+    args.jobs = args.validator_jobs = args.parse_jobs = 1
+    if args.profile:
+        stats = profiler.enable()
+    if args.profile_dump:
+        prof = cProfile.Profile()
+        prof.enable()
+    try:
+        _run(args)
+    finally:
+        if args.profile_dump:
+            prof.disable()
+            prof.dump_stats(args.profile_dump)
+        if args.profile:
+            sys.stderr.write(stats.report() + '\n')
+
+
+def _run(args):
+    if args.cache_dir:
+        yaml_cache = cache.DiskCache(args.cache_dir,
+                                     args.cache_size * 1024 * 1024)
+    else:
+        yaml_cache = None
+    memory_budget = args.memory_budget * 1024 * 1024
+    if args.serve:
+        try:
+            server.serve(args.serve, cache=yaml_cache,
+                         memory_budget=memory_budget)
+        except server.ServerError as e:
+            sys.exit('mpl-check: {0}'.format(e))
+        return
     if args.select:
         select = args.select.split(',')
     else:
@@ -61,10 +220,34 @@ def run():
         ignore = args.ignore.split(',')
     else:
         ignore = None
-    errors = m.validate(select=select, ignore=ignore)
     fmt = manager.PlainTextFormatter()
-    for l in fmt.format(errors):
-        print(l)
+    if args.watch:
+        watcher = watch.PackageWatcher(args.watch, select=select,
+                                       ignore=ignore, cache=yaml_cache,
+                                       memory_budget=memory_budget)
+        for errors in watcher.watch(args.watch_interval):
+            if not args.stream:
+                errors = sorted(errors, key=lambda err: err.code)
+            print('{0}: {1} error(s)'.format(args.watch, len(errors)))
+            for e in errors:
+                print(fmt.format_error(e))
+            sys.stdout.flush()
+        return
+    pkg_paths = list(pkg_loader.find_packages(args.pkg_path, args.catalog))
+    results = manager.validate_packages(pkg_paths, select=select,
+                                        ignore=ignore, sort=not args.stream,
+                                        jobs=args.jobs, cache=yaml_cache,
+                                        validator_jobs=args.validator_jobs,
+                                        executor=args.validator_executor,
+                                        parse_jobs=args.parse_jobs,
+                                        memory_budget=memory_budget)
+    for pkg_path, errors in results:
+        if len(pkg_paths) > 1:
+            print('{0}:'.format(pkg_path))
+        for e in errors:
+            print(fmt.format_error(e))
+            sys.stdout.flush()
+
 
 if __name__ == '__main__':
     run()
@@ -13,5 +13,8 @@
 #    under the License.
 
 MANIFEST_PATH = 'manifest.yaml'
+PACKAGE_DIRS = ('Classes', 'UI')
 DEFAULT_FORMAT = 'MuranoPL'
-DEFAULT_VERSION = '1.0'
\ No newline at end of file
+DEFAULT_VERSION = '1.0'
+YAML_EXTENSIONS = ('.yaml', '.yml')
+PACKAGE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2')
@@ -12,17 +12,52 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import six
 
-class CheckError(Exception):
+from mplcheck import yaml_loader
+
+_SCALARS = (bool, float, type(None)) + six.integer_types
+
+MAX_ARG_LENGTH = 200
+
+
+class CheckError(object):
+    """Error reported by a checker
+
+    Errors only keep their code, position and message arguments. The
+    message and the source snippet are rendered when they are first
+    requested, so errors that are filtered out or never printed cost
+    little. Snippets are read through lines, e.g. a FileRef, so errors
+    do not hold files or parsed documents.
+    """
+
+    __slots__ = ('code', 'filename', 'line', 'column', '_message', '_args',
+                 '_lines', '_source')
 
     def __init__(self, code, message, filename=None,
-                 line=0, column=0, source=None):
+                 line=0, column=0, source=None, args=(), lines=None):
         self.code = code
-        self.message = message
         self.filename = filename
         self.line = line
         self.column = column
-        self.source = source
+        self._message = message
+        self._args = args
+        self._lines = lines
+        self._source = source
+
+    @property
+    def message(self):
+        if self._args:
+            return self._message.format(*self._args)
+        return self._message
+
+    @property
+    def source(self):
+        if self._source is None and self._lines is not None:
+            self._source = yaml_loader.get_snippet(
+                self._lines, self.line - 1, self.column - 1)
+            self._lines = None
+        return self._source
 
     def to_dict(self):
         fields = ('code', 'message', 'filename', 'line', 'column', 'source')
@@ -34,25 +69,121 @@ class CheckError(Exception):
     def __repr__(self):
         return 'CheckError({0})'.format(self.message)
 
+    def __reduce__(self):
+        return error, (self.code, self.message, self.filename,
+                       self.line, self.column, self.source)
+
 
 def error(code, message, filename=None, line=0, column=0, source=None):
     return CheckError(code=code, message=message, filename=filename,
                       line=line, column=column, source=source)
 
 
+def _plain(arg):
+    # NOTE: arguments are often parsed nodes, they are turned into plain
+    # values so errors do not keep parsed documents alive
+    if isinstance(arg, six.text_type):
+        return six.text_type(arg)
+    if isinstance(arg, six.binary_type):
+        return six.binary_type(arg)
+    if isinstance(arg, _SCALARS):
+        return arg
+    return _bounded_str(arg, MAX_ARG_LENGTH)
+
+
+def _bounded_str(arg, limit):
+    """Render str(arg) cut to limit characters
+
+    Mappings, lists and tuples, e.g. method bodies, are walked only as
+    far as limit, so large arguments are not rendered in full.
+    """
+    parts = []
+    length = 0
+    for part in _str_parts(arg, limit):
+        parts.append(part)
+        length += len(part)
+        if length > limit:
+            return ''.join(parts)[:limit] + '...'
+    return ''.join(parts)
+
+
+def _str_parts(obj, limit):
+    if isinstance(obj, dict):
+        yield '{'
+        for i, (key, value) in enumerate(six.iteritems(obj)):
+            if i:
+                yield ', '
+            for part in _repr_parts(key, limit):
+                yield part
+            yield ': '
+            for part in _repr_parts(value, limit):
+                yield part
+        yield '}'
+    elif isinstance(obj, (list, tuple)):
+        yield '[' if isinstance(obj, list) else '('
+        for i, item in enumerate(obj):
+            if i:
+                yield ', '
+            for part in _repr_parts(item, limit):
+                yield part
+        if isinstance(obj, tuple) and len(obj) == 1:
+            yield ','
+        yield ']' if isinstance(obj, list) else ')'
+    else:
+        yield str(obj)
+
+
+def _repr_parts(obj, limit):
+    if isinstance(obj, (dict, list, tuple)):
+        return _str_parts(obj, limit)
+    if isinstance(obj, six.string_types + (six.binary_type,)):
+        # NOTE: only the part of long strings which can be shown is
+        # rendered, slices keep the type, so the quotes stay the same
+        return iter((repr(obj[:limit + 1]),))
+    return iter((repr(obj),))
+
+
 def _report(code):
-    def _report_(message, yaml_obj=None, filename=None):
+    def _report_(message, yaml_obj=None, filename=None, args=()):
+        args = tuple(_plain(arg) for arg in args)
         meta = getattr(yaml_obj, '__yaml_meta__', None)
-        kwargs = {}
-        if meta is not None:
-            kwargs['line'] = meta.line + 1
-            kwargs['column'] = meta.column + 1
-            kwargs['source'] = meta.get_snippet()
-            kwargs['filename'] = filename or meta.name
-        return CheckError(code=code, message=message, **kwargs)
+        if meta is None:
+            return CheckError(code, message, filename=filename, args=args)
+        return CheckError(code, message, filename=filename or meta.name,
+                          line=meta.line + 1, column=meta.column + 1,
+                          args=args, lines=meta.lines())
     return _report_
 
 
+def emits(*codes):
+    """Register error codes a checker can report
+
+    Checkers without registered codes are always run.
+    """
+    def _func(func):
+        func._mpl_codes = frozenset(codes)
+        return func
+    return _func
+
+
+class CodeFilter(object):
+
+    def __init__(self, select=None, ignore=None):
+        self.select = frozenset(select) if select else None
+        self.ignore = frozenset(ignore) if ignore else frozenset()
+
+    def __call__(self, code):
+        if self.select is not None and code not in self.select:
+            return False
+        return code not in self.ignore
+
+    def allows(self, checker):
+        codes = getattr(checker, '_mpl_codes', None)
+        if not isinstance(codes, frozenset):
+            return True
+        return any(self(code) for code in codes)
+
+
 class Report(object):
     def __getattr__(self, name):
         return _report(name)
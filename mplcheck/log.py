@@ -1,7 +1,10 @@
 import logging
 
 LOG_FORMAT = "%(asctime)s %(name)s:%(lineno)d %(levelname)s %(message)s"
-DEFAULT_LEVEL = logging.DEBUG
+DEFAULT_LEVEL = logging.WARNING
+ROOT_LOGGER = 'mplcheck'
+
+LOG_HANDLER = None
 
 
 def setup_handler(log_format=LOG_FORMAT):
@@ -10,10 +13,19 @@ def setup_handler(log_format=LOG_FORMAT):
     return console_log_handler
 
 
-def get_logger(name):
-    logger = logging.getLogger(name)
-    logger.addHandler(LOG_HANDLER)
-    logger.setLevel(DEFAULT_LEVEL)
-    return logger
+def setup(level=DEFAULT_LEVEL, log_format=LOG_FORMAT):
+    """Send messages of all mplcheck loggers to stderr
+
+    The handler is only created by applications, so importing mplcheck
+    does not configure logging.
+    """
+    global LOG_HANDLER
+    logger = logging.getLogger(ROOT_LOGGER)
+    if LOG_HANDLER is None:
+        LOG_HANDLER = setup_handler(log_format)
+        logger.addHandler(LOG_HANDLER)
+    logger.setLevel(level)
 
-LOG_HANDLER = setup_handler()
+
+def get_logger(name):
+    return logging.getLogger(name)
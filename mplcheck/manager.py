@@ -13,70 +13,106 @@
 #    under the License.
 
 import itertools
+import multiprocessing
+import multiprocessing.pool
 import types
 
-import stevedore
-
+from mplcheck.checkers import yaql_checker
 from mplcheck import error
 from mplcheck import log
 from mplcheck import pkg_loader
+from mplcheck import plugin
+from mplcheck import profiler
+from mplcheck import version
 from mplcheck.validators import VALIDATORS
 
 LOG = log.get_logger(__name__)
 
+THREAD_EXECUTOR = 'thread'
+PROCESS_EXECUTOR = 'process'
+
+# NOTE: parsed trees take several times the size of their text, so files
+# parsed in one batch only take a part of the memory budget
+PARSE_BATCH_RATIO = 4
+
+_PLUGINS = None
+
+
+def _load_plugins():
+    global _PLUGINS
+    if _PLUGINS is None:
+        _PLUGINS = plugin.load_extensions(
+            on_load_failure=Manager.failure_hook)
+    return _PLUGINS
+
 
 class Formatter(object):
 
-    def format(self, error):
+    def format_error(self, error):
         pass
 
+    def format(self, errors):
+        return [self.format_error(e) for e in errors]
+
 
 class PlainTextFormatter(Formatter):
 
-    def format(self, errors):
-        lines = []
-        for e in errors:
-            lines.append('{filename}:{line}:{column}: {code} {message}'
-                         ''.format(**e.to_dict()))
-        return lines
+    def format_error(self, error):
+        # NOTE: source is not printed, so its snippet is never rendered
+        return ('{0}:{1}:{2}: {3} {4}'
+                ''.format(error.filename, error.line, error.column,
+                          error.code, error.message))
 
 
 class Manager(object):
 
-    def __init__(self, pkg_path):
-        self.pkg = pkg_loader.load_package(pkg_path)
-        self.validators = VALIDATORS
+    def __init__(self, pkg_path, cache=None, memory_budget=None):
+        self._init(pkg_loader.load_package(pkg_path, cache, memory_budget))
+
+    def _init(self, pkg):
+        self.pkg = pkg
+        self.validators = list(VALIDATORS)
         self.plugins = None
 
-    def _to_list(self, error_chain, select=None, ignore=None):
-        errors = []
-        while True:
+    @classmethod
+    def from_buffer(cls, data, cache=None, memory_budget=None):
+        """Create a manager for a zip package held in memory
+
+        data is bytes, a memoryview or a seekable stream, it is read in
+        place without being written to disk or copied.
+        """
+        mgr = cls.__new__(cls)
+        mgr._init(pkg_loader.load_buffer(data, cache, memory_budget))
+        return mgr
+
+    @staticmethod
+    def _flatten(error_chain, select=None, ignore=None):
+        # NOTE: nested generators are walked with an explicit stack, so
+        # deep code blocks neither recurse nor hit the recursion limit
+        code_filter = error.CodeFilter(select, ignore)
+        stack = [error_chain]
+        while stack:
             try:
-                e = next(error_chain, None)
-                if e is None:
-                    break
+                e = next(stack[-1], None)
             except Exception:
                 LOG.exception('Checker failed')
                 e = error.report.E000(
                     'Checker failed more information in logs')
+            if e is None:
+                stack.pop()
+            elif isinstance(e, types.GeneratorType):
+                stack.append(e)
+            elif code_filter(e.code):
+                yield e
 
-            if isinstance(e, types.GeneratorType):
-                errors.extend(self._to_list(e, select, ignore))
-            else:
-                if ((select and e.code not in select)
-                   or (ignore and e.code in ignore)):
-                    continue
-                errors.append(e)
-
-        return sorted(errors, key=lambda err: err.code)
+    def _to_list(self, error_chain, select=None, ignore=None):
+        return sorted(self._flatten(error_chain, select, ignore),
+                      key=lambda err: err.code)
 
     def load_plugins(self):
         if self.plugins is not None:
             return
-        self.plugins = stevedore.ExtensionManager(
-            'mpl-check.plugins', invoke_on_load=True,
-            propagate_map_exceptions=True,
-            on_load_failure_callback=self.failure_hook)
+        self.plugins = _load_plugins()
         plugin_validators = list(itertools.chain(
             *(p.obj.validators for p in self.plugins)
         ))
@@ -87,10 +123,293 @@ class Manager(object):
         LOG.info('Could not load %r: %s', ep.name, err)
         raise err
 
-    def validate(self, validators=None, select=None, ignore=None):
+    def create_validators(self, validators=None, select=None, ignore=None):
         validators = validators or self.validators
-        report_chains = []
+        code_filter = error.CodeFilter(select, ignore)
+        instances = []
         for validator in validators:
             v = validator(self.pkg)
-            report_chains.append(v.run())
-        return self._to_list(itertools.chain(*report_chains), select, ignore)
+            if hasattr(v, 'set_code_filter'):
+                v.set_code_filter(code_filter)
+            instances.append(v)
+        return instances
+
+    def validate(self, validators=None, select=None, ignore=None, sort=True,
+                 jobs=1, executor=THREAD_EXECUTOR, parse_jobs=1):
+        """Run validators over the package
+
+        Returns a list of errors sorted by code, or, when sort is False,
+        a generator yielding errors as soon as checkers report them.
+
+        With jobs > 1 every file matched by a validator is checked as a
+        separate task on a pool of threads or processes. Results are
+        merged in the same order as in a sequential run.
+
+        With parse_jobs > 1 YAML files checked by the validators are
+        parsed on a pool of processes before the validators run.
+        """
+        instances = self.create_validators(validators, select, ignore)
+        if parse_jobs > 1:
+            self._parse_files(instances, parse_jobs)
+        if jobs > 1:
+            error_chain = self._run_parallel(instances, select, ignore,
+                                             jobs, executor)
+        elif self.pkg.cache is not None:
+            error_chain = itertools.chain.from_iterable(
+                self.run_cached(v, filename, select, ignore)
+                for v, filename in self._tasks(instances))
+        else:
+            error_chain = itertools.chain(*[
+                profiler.timed_iter(type(v).__name__, v.run)
+                for v in instances])
+        if sort:
+            return self._to_list(error_chain, select, ignore)
+        return self._flatten(error_chain, select, ignore)
+
+    @staticmethod
+    def _tasks(instances):
+        tasks = []
+        for v in instances:
+            files = getattr(v, 'files', None)
+            if files is None:
+                tasks.append((v, None))
+            else:
+                tasks.extend((v, filename) for filename in files())
+        return tasks
+
+    def _result_key(self, v, filename, select, ignore):
+        # NOTE: the location of the package is not a part of the key and
+        # filenames of errors are relative to the package, so results are
+        # shared by copies of a package, e.g. in other CI workspaces
+        cls = type(v)
+        return self.pkg.cache.key(
+            'results', cls.__module__, cls.__name__,
+            self.pkg.format, self.pkg.version,
+            ','.join(sorted(select)) if select else '*',
+            ','.join(sorted(ignore or ())),
+            str(version.distribution_version('yaql')),
+            filename, self.pkg.read(filename).raw())
+
+    def run_cached(self, v, filename, select=None, ignore=None):
+        """Run a validator over a file reusing errors of earlier runs
+
+        Errors are only cached for validators of mplcheck which opt in
+        with cacheable. The key only covers sources of mplcheck, so
+        results of validators from plugins, even derived from cacheable
+        ones, are always computed.
+        """
+        if (self.pkg.cache is None or filename is None or
+                not getattr(v, 'cacheable', False) or
+                type(v).__module__.split('.')[0] != 'mplcheck'):
+            return run_task(v, filename)
+        key = self._result_key(v, filename, select, ignore)
+        errors = self.pkg.cache.get(key)
+        if errors is not None:
+            return iter(errors)
+        return self._store_results(key, run_task(v, filename),
+                                   select, ignore)
+
+    def _store_results(self, key, error_chain, select, ignore):
+        code_filter = error.CodeFilter(select, ignore)
+        errors = []
+        failed = False
+        for e in self._flatten(error_chain):
+            # NOTE: E000 marks a crashed checker, which is never cached
+            # even when E000 itself is filtered out
+            failed = failed or e.code == 'E000'
+            if code_filter(e.code):
+                errors.append(e)
+                yield e
+        if not failed:
+            self.pkg.cache.set(key, errors)
+
+    def _parse_files(self, instances, jobs):
+        """Parse files checked by validators on a pool of processes
+
+        Files are read and parsed in batches taking a part of the memory
+        budget, so only one batch of files is held at a time.
+        """
+        if multiprocessing.current_process().daemon:
+            return
+        filenames = set()
+        for v in instances:
+            files = getattr(v, 'files', None)
+            if files is not None:
+                filenames.update(files())
+        batch_size = self.pkg.memory_budget // PARSE_BATCH_RATIO
+        pool = None
+        batch = []
+        size = 0
+        try:
+            for filename in sorted(filenames):
+                wrapper = self.pkg.read(filename)
+                if not wrapper.needs_parsing():
+                    continue
+                batch.append(wrapper)
+                size += len(wrapper.raw())
+                if size < batch_size:
+                    continue
+                if pool is None:
+                    pool = multiprocessing.Pool(min(jobs, len(filenames)))
+                _parse_batch(pool, batch)
+                batch = []
+                size = 0
+            # NOTE: a single file is left to be parsed by validators
+            if batch and (pool is not None or len(batch) > 1):
+                if pool is None:
+                    pool = multiprocessing.Pool(min(jobs, len(batch)))
+                _parse_batch(pool, batch)
+        except BaseException:
+            if pool is not None:
+                pool.terminate()
+            raise
+        else:
+            if pool is not None:
+                pool.close()
+        finally:
+            if pool is not None:
+                pool.join()
+
+    def _run_parallel(self, instances, select, ignore, jobs, executor):
+        tasks = self._tasks(instances)
+        if not tasks:
+            return iter(())
+
+        if (executor == PROCESS_EXECUTOR and not self.pkg.in_memory and
+                not multiprocessing.current_process().daemon):
+            pool = multiprocessing.Pool(min(jobs, len(tasks)))
+            func = _run_validator_task
+            tasks = [(self.pkg.path, self.pkg.cache, self.pkg.memory_budget,
+                      type(v), filename, select, ignore)
+                     for v, filename in tasks]
+        else:
+            # NOTE: daemonic processes, like batch workers, cannot have
+            # children and packages held in memory cannot be loaded by
+            # workers, so they fall back to threads
+            pool = multiprocessing.pool.ThreadPool(min(jobs, len(tasks)))
+
+            def func(task):
+                v, filename = task
+                return list(self._flatten(
+                    self.run_cached(v, filename, select, ignore),
+                    select, ignore))
+        return itertools.chain.from_iterable(_imap(pool, func, tasks))
+
+
+def run_task(validator, filename):
+    name = type(validator).__name__
+    if filename is None:
+        return profiler.timed_iter(name, validator.run)
+    return profiler.timed_iter(name, validator.run_file, filename)
+
+
+_WORKER_MANAGER = None
+
+
+def _run_validator_task(task):
+    global _WORKER_MANAGER
+    (pkg_path, cache, memory_budget, validator_cls, filename,
+     select, ignore) = task
+    if _WORKER_MANAGER is None or _WORKER_MANAGER.pkg.path != pkg_path:
+        if _WORKER_MANAGER is not None:
+            _WORKER_MANAGER.pkg.close()
+        _WORKER_MANAGER = Manager(pkg_path, cache=cache,
+                                  memory_budget=memory_budget)
+    v, = _WORKER_MANAGER.create_validators([validator_cls], select, ignore)
+    return list(_WORKER_MANAGER._flatten(
+        _WORKER_MANAGER.run_cached(v, filename, select, ignore),
+        select, ignore))
+
+
+def _parse_yaml_task(task):
+    return pkg_loader.parse_yaml(*task)
+
+
+def _parse_batch(pool, wrappers):
+    tasks = [(w.name, w.raw()) for w in wrappers]
+    for wrapper, parsed in zip(wrappers, pool.imap(_parse_yaml_task, tasks)):
+        wrapper.set_yaml(*parsed)
+
+
+def _imap(pool, func, tasks):
+    try:
+        for result in pool.imap(func, tasks):
+            yield result
+    except BaseException:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+
+
+def warm_up():
+    """Load plugins and build yaql engines ahead of validation"""
+    _load_plugins()
+    yaql_checker.get_engine()
+
+
+def _validate_package(task):
+    pkg_path, cache, memory_budget, options = task
+    mgr = None
+    try:
+        mgr = Manager(pkg_path, cache=cache, memory_budget=memory_budget)
+        mgr.load_plugins()
+        errors = mgr.validate(**options)
+    except Exception:
+        LOG.exception('Validation of %s failed', pkg_path)
+        if mgr is not None:
+            mgr.pkg.close()
+        return pkg_path, [error.report.E000(
+            'Cannot validate package, more information in logs',
+            filename=pkg_path)]
+    if isinstance(errors, list):
+        mgr.pkg.close()
+        return pkg_path, errors
+    return pkg_path, _closing(mgr.pkg, errors)
+
+
+def _closing(pkg, errors):
+    # NOTE: streamed errors are found while they are consumed, so the
+    # package is closed once they are exhausted
+    try:
+        for e in errors:
+            yield e
+    finally:
+        pkg.close()
+
+
+def _validate_package_in_worker(task):
+    pkg_path, errors = _validate_package(task)
+    return pkg_path, list(errors)
+
+
+def validate_packages(pkg_paths, select=None, ignore=None, sort=True,
+                      jobs=1, cache=None, validator_jobs=1,
+                      executor=THREAD_EXECUTOR, parse_jobs=1,
+                      memory_budget=None):
+    """Validate several packages, yielding (path, errors) in input order
+
+    With jobs > 1 packages are spread over a pool of worker processes
+    which keep plugins and yaql engines loaded between packages. Errors
+    are only streamed when packages are validated in this process.
+    validator_jobs, executor and parse_jobs are passed to
+    Manager.validate. memory_budget bounds, in bytes, memory taken by
+    files read from each package.
+    """
+    options = dict(select=select, ignore=ignore, sort=sort,
+                   jobs=validator_jobs, executor=executor,
+                   parse_jobs=parse_jobs)
+    tasks = [(pkg_path, cache, memory_budget, options)
+             for pkg_path in pkg_paths]
+    if jobs <= 1 or len(tasks) <= 1:
+        # NOTE: yaql engines are built on demand, so nothing is spent on
+        # them when results come from the cache
+        for task in tasks:
+            yield _validate_package(task)
+        return
+
+    pool = multiprocessing.Pool(min(jobs, len(tasks)), warm_up)
+    for result in _imap(pool, _validate_package_in_worker, tasks):
+        yield result
@@ -14,42 +14,398 @@
 
 
 import abc
+import array
+import bisect
+import collections
+import io
 import os
+import posixpath
 import re
+import stat
+import tarfile
+import threading
+import weakref
 import zipfile
 
 import six
 import yaml
 
 from mplcheck import consts
+from mplcheck import profiler
 from mplcheck import yaml_loader
 
+_NOT_PARSED = object()
+
+# NOTE: larger tar members and members other than YAML files are read from
+# the archive when they are opened
+MAX_MEMORY_MEMBER_SIZE = 1024 * 1024
+
+BUFFER_NAME = '<buffer>'
+
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+# NOTE: parsed trees are not measured, their size is estimated from the
+# number of nodes, which takes a fraction of the time of parsing
+NODE_SIZE = 200
+
+# NOTE: os.scandir is only available since Python 3.5
+_scandir = getattr(os, 'scandir', None)
+
+# NOTE: the same line breaks as counted by the YAML reader
+_LINE_BREAK = re.compile(u'\r\n|[\n\r\x85\u2028\u2029]')
+_BYTES_LINE_BREAK = re.compile(
+    b'\r\n|[\n\r]|\xc2\x85|\xe2\x80[\xa8\xa9]')
+
+
+class Lines(object):
+    """Lines of raw file content, found through offsets of line starts"""
+    __slots__ = ('_raw', '_line_starts')
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._line_starts = None
+
+    def _line_break(self):
+        if isinstance(self._raw, six.binary_type):
+            return _BYTES_LINE_BREAK
+        return _LINE_BREAK
+
+    def _get_line_starts(self):
+        if self._line_starts is None:
+            starts = array.array('L', [0])
+            starts.extend(m.end()
+                          for m in self._line_break().finditer(self._raw))
+            self._line_starts = starts
+        return self._line_starts
+
+    def line_range(self, line):
+        """Returns start and end offsets of a line in raw content
+
+        The end excludes the line break. Returns None for lines past the
+        end of the file.
+        """
+        starts = self._get_line_starts()
+        if not 0 <= line < len(starts):
+            return None
+        start = starts[line]
+        if line + 1 == len(starts):
+            return start, len(self._raw)
+        # NOTE: line breaks are at most three bytes long, so only the end
+        # of the line is searched
+        pos = max(start, starts[line + 1] - 3)
+        return start, self._line_break().search(self._raw, pos).start()
+
+    def line(self, line):
+        """Returns text of a line, lines are counted from 0"""
+        line_range = self.line_range(line)
+        if line_range is None:
+            return None
+        text = self._raw[line_range[0]:line_range[1]]
+        if isinstance(text, six.binary_type):
+            text = text.decode('utf-8', 'replace')
+        return text
+
+
+class FileRef(object):
+    """Refers to a file of a package without holding its content
+
+    Lines are read through the package, so they cost nothing until they
+    are requested and are only kept within the memory budget. When the
+    package is closed references still in use are detached, they keep
+    lines of their file instead of the package.
+    """
+    __slots__ = ('pkg', 'path', '_lines', '__weakref__')
+
+    def __init__(self, pkg, path):
+        self.pkg = pkg
+        self.path = path
+        self._lines = None
+
+    def line(self, line):
+        pkg = self.pkg
+        if pkg is None:
+            return self._lines.line(line)
+        return pkg.read(self.path).line(line)
+
+    def detach(self):
+        """Keeps lines of the file and drops the package"""
+        if self.pkg is not None:
+            self._lines = self.pkg.read(self.path).lines()
+            self.pkg = None
+
 
 class FileWrapper(object):
 
     def __init__(self, pkg, path):
+        self._pkg = pkg
         self._path = path
+        self._cache = pkg.cache
         with pkg.open_file(path) as file_:
+            self._name = getattr(file_, 'name', path)
             self._raw = file_.read()
-
-        with pkg.open_file(path) as file_:
-            try:
-                self._yaml = list(yaml.load_all(file_, yaml_loader.YamlLoader))
-            except yaml.YAMLError:
-                self._yaml = None
+        self._yaml = _NOT_PARSED
+        self._lines = Lines(self._raw)
+        self._nodes = 0
 
     def raw(self):
         return self._raw
 
+    @property
+    def path(self):
+        return self._path
+
+    def ref(self):
+        return self._pkg.file_ref(self._path)
+
+    def lines(self):
+        return self._lines
+
+    def size(self):
+        """Estimates memory taken by raw() and parsed documents"""
+        return len(self._raw) + self._nodes * NODE_SIZE
+
+    def line_range(self, line):
+        return self._lines.line_range(line)
+
+    def line(self, line):
+        return self._lines.line(line)
+
+    @property
+    def name(self):
+        return self._name
+
     def yaml(self):
+        if self.needs_parsing():
+            self.set_yaml(*parse_yaml(self._name, self._raw))
+        if self._yaml is _NOT_PARSED:
+            return None
         return self._yaml
 
+    def is_yaml(self):
+        return self._path.endswith(consts.YAML_EXTENSIONS)
+
+    def needs_parsing(self):
+        """Tells whether the file still has to be parsed
+
+        Documents found in the cache are loaded by the way.
+        """
+        if self._yaml is not _NOT_PARSED or not self.is_yaml():
+            return False
+        if self._cache is None:
+            return True
+        cached = self._cache.get(self._cache_key())
+        if cached is None:
+            return True
+        source, documents = cached
+        source.name = self._name
+        source.file = self
+        self._set_documents(documents)
+        return False
+
+    def set_yaml(self, source, documents):
+        """Sets documents parsed from raw(), e.g. by parse_yaml"""
+        source.file = self
+        if documents is not None and self._cache is not None:
+            self._cache.set(self._cache_key(), (source, documents))
+        self._set_documents(documents)
+
+    def _set_documents(self, documents):
+        self._yaml = documents
+        self._nodes = _count_nodes(documents)
+        self._pkg.file_parsed(self)
+
+    def _cache_key(self):
+        # NOTE: the file name is not a part of the key, it is set on the
+        # source, so files with the same content share cache entries
+        return self._cache.key('yaml', yaml_loader.BaseLoader.__name__,
+                               self._raw)
+
+
+def _count_nodes(documents):
+    count = 0
+    stack = [documents]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if isinstance(node, dict):
+            stack.extend(six.iterkeys(node))
+            stack.extend(six.itervalues(node))
+        elif isinstance(node, list):
+            stack.extend(node)
+    return count
+
+
+def parse_yaml(name, raw):
+    """Parses YAML documents, returns their source and a list of them
+
+    The list is None when raw is not valid YAML.
+    """
+    if isinstance(raw, six.binary_type):
+        stream = six.BytesIO(raw)
+    else:
+        stream = six.StringIO(raw)
+    source = yaml_loader.YamlSource(name)
+    stream.name = name
+    stream.yaml_source = source
+    profiler.count('yaml bytes parsed', len(raw))
+    try:
+        documents = yaml.load_all(stream, yaml_loader.YamlLoader)
+        return source, profiler.call('yaml parsing', list, documents)
+    except yaml.YAMLError:
+        return source, None
+
+
+class FileIndex(object):
+    """Immutable listing of files of a package
+
+    Names are kept sorted, so files under a directory are found with a
+    binary search. Stat data is kept as (size, mtime) or None when it is
+    not known.
+    """
+
+    def __init__(self, entries):
+        self._stats = dict(entries)
+        self.names = tuple(sorted(self._stats))
+
+    def __contains__(self, name):
+        return name in self._stats
+
+    def __len__(self):
+        return len(self.names)
+
+    def stat(self, name):
+        return self._stats.get(name)
+
+    def names_under(self, prefix):
+        start = bisect.bisect_left(self.names, prefix)
+        end = start
+        while end < len(self.names) and self.names[end].startswith(prefix):
+            end += 1
+        return self.names[start:end]
+
+
+_PATTERNS = {}
+
+
+def _compile(regex):
+    pattern = _PATTERNS.get(regex)
+    if pattern is None:
+        pattern = _PATTERNS[regex] = re.compile(regex)
+    return pattern
+
+
+class FileCache(object):
+    """Segmented LRU of files read from a package, bounded in bytes
+
+    Files enter on probation and are protected once they are read again.
+    Files on probation are evicted first, so files needed by several
+    validators are not pushed out by files read only once.
+    """
+
+    def __init__(self, budget=DEFAULT_MEMORY_BUDGET, protected_ratio=0.8):
+        self.budget = budget
+        self._protected_budget = int(budget * protected_ratio)
+        self._probation = collections.OrderedDict()
+        self._protected = collections.OrderedDict()
+        self._sizes = {}
+        self._protected_size = 0
+        self.size = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        return key in self._sizes
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._protected:
+                value = self._protected.pop(key)
+                self._protected[key] = value
+                return value
+            if key in self._probation:
+                value = self._probation.pop(key)
+                self._protected[key] = value
+                self._protected_size += self._sizes[key]
+                self._balance()
+                return value
+            return None
+
+    def set(self, key, value, size):
+        with self._lock:
+            self._discard(key)
+            self._probation[key] = value
+            self._sizes[key] = size
+            self.size += size
+            self._evict(key)
+
+    def resize(self, key, value, size):
+        """Updates size of an entry if it still holds value"""
+        with self._lock:
+            if key in self._protected:
+                segment = self._protected
+            else:
+                segment = self._probation
+            if segment.get(key) is not value:
+                return
+            delta = size - self._sizes[key]
+            self._sizes[key] = size
+            self.size += delta
+            if segment is self._protected:
+                self._protected_size += delta
+                self._balance()
+            self._evict(key)
+
+    def pop(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def _discard(self, key):
+        size = self._sizes.pop(key, None)
+        if size is None:
+            return
+        self.size -= size
+        if key in self._protected:
+            del self._protected[key]
+            self._protected_size -= size
+        else:
+            del self._probation[key]
+
+    def _balance(self):
+        # NOTE: files pushed out of the protected segment get another
+        # chance on probation
+        while self._protected_size > self._protected_budget:
+            key, value = self._protected.popitem(last=False)
+            self._protected_size -= self._sizes[key]
+            self._probation[key] = value
+
+    def _evict(self, keep):
+        # NOTE: the file just stored or resized is kept even when it does
+        # not fit on its own, it is being used
+        while self.size > self.budget:
+            for segment in (self._probation, self._protected):
+                victim = next((key for key in segment if key != keep), None)
+                if victim is not None:
+                    break
+            else:
+                return
+            self._discard(victim)
+
 
 @six.add_metaclass(abc.ABCMeta)
 class BaseLoader(object):
+    # NOTE: packages held in memory cannot be loaded again by path, e.g.
+    # in worker processes
+    in_memory = False
+
     def __init__(self, path):
         self.path = path
-        self._cached_files = dict()
+        self._cached_files = FileCache()
+        self._index = None
+        self._root_indexes = {}
+        self._file_refs = weakref.WeakValueDictionary()
+        self._file_refs_lock = threading.Lock()
+        self.cache = None
         self.format = consts.DEFAULT_FORMAT
         self.version = consts.DEFAULT_VERSION
 
@@ -59,15 +415,30 @@ class BaseLoader(object):
         pass
 
     @classmethod
-    def try_load(cls, path):
+    def try_load(cls, path, cache=None, memory_budget=None):
         loader = cls._try_load(path)
         if loader:
+            loader.cache = cache
+            if memory_budget is not None:
+                loader.set_memory_budget(memory_budget)
             loader.try_set_format()
         return loader
 
+    @property
+    def memory_budget(self):
+        return self._cached_files.budget
+
+    def set_memory_budget(self, budget):
+        """Bounds memory taken by files read, dropping those read so far"""
+        self._cached_files = FileCache(budget)
+
     @abc.abstractmethod
-    def list_files(self, subdir=None):
-        pass
+    def _scan(self, roots=None):
+        """Yields (name, stat) of files of the package under roots
+
+        A root is a file name or a directory name ending with a slash.
+        The whole package is scanned when roots is None.
+        """
 
     @abc.abstractmethod
     def open_file(self, path, mode='r'):
@@ -77,15 +448,92 @@ class BaseLoader(object):
     def exists(self, name):
         pass
 
-    def search_for(self, regex='.*', subdir=None):
-        r = re.compile(regex)
-        return (f for f in self.list_files(subdir) if r.match(f))
+    def file_index(self, root=None):
+        """Returns index of the package or, until it is built, of a root"""
+        if self._index is not None:
+            return self._index
+        if root is None:
+            self._index = FileIndex(self._scan())
+            self._root_indexes = {}
+            return self._index
+        index = self._root_indexes.get(root)
+        if index is None:
+            index = self._root_indexes[root] = FileIndex(self._scan([root]))
+        return index
+
+    def _names(self, roots):
+        if roots is None:
+            return self.file_index().names
+        names = []
+        for root in roots:
+            index = self.file_index(root)
+            if root.endswith('/'):
+                names.extend(index.names_under(root))
+            elif root in index:
+                names.append(root)
+        if len(roots) > 1:
+            names = sorted(set(names))
+        return names
+
+    def list_files(self, subdir=None, roots=None):
+        """Lists files of the package
+
+        With roots only files under them are listed, and only those
+        subtrees are scanned. Names listed for a subdir and roots
+        given with it are relative to the subdir.
+        """
+        if subdir is None:
+            return list(self._names(roots))
+        prefix = subdir.rstrip('/') + '/'
+        if roots is None:
+            roots = [prefix]
+        else:
+            roots = [prefix + root for root in roots]
+        return [name[len(prefix):] for name in self._names(roots)]
+
+    def stat_files(self, roots=None):
+        """Scans (name, stat) of files under roots, bypassing the index
+
+        stat is None for files removed while they are scanned. The whole
+        package is scanned when roots is None.
+        """
+        return list(self._scan(roots))
+
+    def search_for(self, regex='.*', subdir=None, roots=None):
+        r = _compile(regex)
+        return (f for f in self.list_files(subdir, roots) if r.match(f))
 
     def read(self, path):
-        if path in self._cached_files:
-            return self._cached_files[path]
-        self._cached_files[path] = FileWrapper(self, path)
-        return self._cached_files[path]
+        file_ = self._cached_files.get(path)
+        if file_ is None:
+            file_ = FileWrapper(self, path)
+            self._cached_files.set(path, file_, file_.size())
+        return file_
+
+    def file_parsed(self, file_):
+        self._cached_files.resize(file_.path, file_, file_.size())
+
+    def file_ref(self, path):
+        """Returns a reference to a file, shared while it is in use"""
+        with self._file_refs_lock:
+            ref = self._file_refs.get(path)
+            if ref is None:
+                ref = self._file_refs[path] = FileRef(self, path)
+            return ref
+
+    def invalidate(self, paths):
+        self._index = None
+        self._root_indexes = {}
+        for path in paths:
+            self._cached_files.pop(path)
+
+    def close(self):
+        """Releases the package, references to its files are detached"""
+        with self._file_refs_lock:
+            refs = list(self._file_refs.values())
+            self._file_refs = weakref.WeakValueDictionary()
+        for ref in refs:
+            ref.detach()
 
     def try_set_format(self):
         if self.exists(consts.MANIFEST_PATH):
@@ -96,6 +544,22 @@ class BaseLoader(object):
                 self.version = version
 
 
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return st.st_size, st.st_mtime
+
+
+def _under(name, root):
+    if root.endswith('/'):
+        return name.startswith(root)
+    return name == root
+
+
 class DirectoryLoader(BaseLoader):
 
     @classmethod
@@ -107,31 +571,134 @@ class DirectoryLoader(BaseLoader):
     def open_file(self, path, mode='r'):
         return open(os.path.join(self.path, path), mode)
 
-    def list_files(self, subdir=None):
-        path = self.path
-        if subdir is not None:
-            path = os.path.join(path, subdir)
-
-        files = []
-        for dirpath, dirnames, filenames in os.walk(path):
-            files.extend(
-                os.path.relpath(
-                    os.path.join(dirpath, filename), self.path)
-                for filename in filenames)
-        if subdir is None:
-            return files
-        subdir_len = len(subdir)
-        return [file_[subdir_len:].lstrip('/') for file_ in files]
+    def _scan(self, roots=None):
+        for root in roots or ['']:
+            if root and not root.endswith('/'):
+                file_stat = _stat(os.path.join(self.path, root))
+                if file_stat is not None:
+                    yield root, file_stat
+            elif _scandir is None:
+                for item in self._walk(root):
+                    yield item
+            else:
+                for item in self._scandir(root):
+                    yield item
+
+    def _scandir(self, root):
+        stack = [root]
+        while stack:
+            relpath = stack.pop()
+            try:
+                entries = list(_scandir(os.path.join(self.path, relpath)))
+            except OSError:
+                continue
+            for entry in entries:
+                name = relpath + entry.name
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    # NOTE: like os.walk, links to directories are neither
+                    # listed nor followed, they may form loops
+                    if not entry.is_symlink():
+                        stack.append(name + '/')
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    yield name, None
+                else:
+                    yield name, (st.st_size, st.st_mtime)
+
+    def _walk(self, root):
+        top = os.path.join(self.path, root)
+        for dirpath, dirnames, filenames in os.walk(top):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, self.path).replace(os.sep, '/')
+                yield name, _stat(path)
 
     def exists(self, name):
         return os.path.exists(os.path.join(self.path, name))
 
 
-class ZipLoader(BaseLoader):
+class ArchiveLoader(BaseLoader):
+    """Base of loaders reading packages from archives
+
+    Members are indexed once, when the archive is opened, so lookups by
+    name never go to the archive and directories are known even without
+    entries of their own.
+    """
+
+    def _index_members(self, members):
+        """Indexes (name, info) pairs, info is None for directories"""
+        self._infos = {}
+        dirs = set()
+        for name, info in members:
+            if info is None:
+                dirname = name.rstrip('/')
+            else:
+                self._infos[name] = info
+                dirname = name[:max(name.rfind('/'), 0)]
+            while dirname and dirname not in dirs:
+                dirs.add(dirname)
+                dirname = dirname[:max(dirname.rfind('/'), 0)]
+        self._dirs = frozenset(dirs)
+        self._index = FileIndex(self._scan())
+
+    @abc.abstractmethod
+    def _member_stat(self, info):
+        pass
+
+    def member_info(self, name):
+        """Returns archive info of a file, with its sizes and compression"""
+        return self._infos[name]
+
+    def _scan(self, roots=None):
+        for name, info in six.iteritems(self._infos):
+            if roots is None or any(_under(name, root) for root in roots):
+                yield name, self._member_stat(info)
+
+    def exists(self, name):
+        return name in self._infos or name.rstrip('/') in self._dirs
+
+
+class ZipLoader(ArchiveLoader):
 
     def __init__(self, path):
         super(ZipLoader, self).__init__(path)
-        self._zipfile = zipfile.ZipFile(self.path)
+        self._local = threading.local()
+        self._handles = []
+        self._handles_lock = threading.Lock()
+        self._index_members(
+            (info.filename, None if info.filename.endswith('/') else info)
+            for info in self._open_archive().infolist())
+
+    def _open_archive(self):
+        """Returns the archive handle of the current thread
+
+        Handles share neither file positions nor locks, so threads read
+        members concurrently.
+        """
+        handle = getattr(self._local, 'handle', None)
+        if handle is None:
+            handle = self._new_handle()
+            with self._handles_lock:
+                self._handles.append(handle)
+            self._local.handle = handle
+        return handle
+
+    def _new_handle(self):
+        return zipfile.ZipFile(self.path)
+
+    def close(self):
+        super(ZipLoader, self).close()
+        with self._handles_lock:
+            handles, self._handles = self._handles, []
+        for handle in handles:
+            handle.close()
+        self._local = threading.local()
 
     @classmethod
     def _try_load(cls, path):
@@ -141,40 +708,219 @@ class ZipLoader(BaseLoader):
             return None
 
     def open_file(self, name, mode='r'):
-        return self._zipfile.open(name, mode)
+        return self._open_archive().open(self._infos[name], mode)
+
+    def _member_stat(self, info):
+        return info.file_size, info.date_time
+
+
+class _BufferFile(io.RawIOBase):
+    """Read-only file over a memoryview, reads do not copy the buffer"""
+
+    def __init__(self, buffer):
+        super(_BufferFile, self).__init__()
+        self._buffer = buffer
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        data = self._buffer[self._pos:self._pos + len(b)]
+        size = len(data)
+        b[:size] = data
+        self._pos += size
+        return size
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._buffer)
+        if offset < 0:
+            raise ValueError('Negative seek position {0}'.format(offset))
+        self._pos = offset
+        return offset
+
+    def tell(self):
+        return self._pos
+
+
+class ZipBufferLoader(ZipLoader):
+    """Loads zip packages from bytes, memoryviews or seekable streams
+
+    Buffers are never copied, every thread reads members through its
+    own file over the same buffer. Threads share the position of a
+    stream, so members of a stream are read whole under a lock.
+    """
+
+    in_memory = True
+
+    def __init__(self, data):
+        if isinstance(data, (six.binary_type, bytearray, memoryview)):
+            self._buffer = memoryview(data)
+            self._stream = None
+        else:
+            self._buffer = None
+            self._stream = data
+        self._stream_lock = threading.Lock()
+        super(ZipBufferLoader, self).__init__(
+            getattr(data, 'name', BUFFER_NAME))
+
+    def _new_handle(self):
+        return zipfile.ZipFile(_BufferFile(self._buffer))
+
+    def _open_archive(self):
+        if self._stream is None:
+            return super(ZipBufferLoader, self)._open_archive()
+        with self._handles_lock:
+            if not self._handles:
+                self._handles.append(zipfile.ZipFile(self._stream))
+            return self._handles[0]
 
-    def list_files(self, subdir=None):
-        files = self._zipfile.namelist()
-        if subdir is None:
-            return files
-        subdir_len = len(subdir)
-        return [file_[subdir_len:].lstrip('/') for file_ in files
-                if file_.startswith(subdir)]
+    def open_file(self, name, mode='r'):
+        if self._stream is None:
+            return super(ZipBufferLoader, self).open_file(name, mode)
+        with self._stream_lock:
+            with self._open_archive().open(self._infos[name],
+                                           mode) as member:
+                data = member.read()
+        return six.BytesIO(data)
 
-    def exists(self, name):
-        try:
-            self._zipfile.getinfo(name)
-            return True
-        except KeyError:
-            pass
 
-        if not name.endswith('/'):
-            try:
-                self._zipfile.getinfo(name + '/')
-                return True
-            except KeyError:
-                pass
-        return False
+class TarLoader(ArchiveLoader):
+    """Loads packages from tar archives, compressed or not
 
+    The archive is read in a single pass. YAML members up to
+    MAX_MEMORY_MEMBER_SIZE bytes are kept in memory, other members are
+    skipped and only read when they are opened, through an archive
+    handle kept open until the package is closed.
+    """
 
-PACKAGE_LOADERS = [DirectoryLoader, ZipLoader]
+    def __init__(self, path):
+        super(TarLoader, self).__init__(path)
+        self._data = {}
+        self._archive = None
+        self._archive_lock = threading.Lock()
+        with tarfile.open(self.path, 'r:*') as archive:
+            self._index_members(self._read_members(archive))
+
+    def _read_members(self, archive):
+        for info in archive:
+            name = posixpath.normpath(info.name)
+            if name == '.':
+                continue
+            if info.isdir():
+                yield name, None
+            elif info.isfile():
+                if (info.size <= MAX_MEMORY_MEMBER_SIZE and
+                        name.endswith(consts.YAML_EXTENSIONS)):
+                    self._data[name] = archive.extractfile(info).read()
+                yield name, info
 
+    @classmethod
+    def _try_load(cls, path):
+        if not os.path.isfile(path):
+            return None
+        try:
+            return cls(path)
+        except tarfile.TarError:
+            return None
 
-def load_package(package):
-    for loader_cls in PACKAGE_LOADERS:
-        loader = loader_cls.try_load(package)
+    def open_file(self, name, mode='r'):
+        data = self._data.get(name)
+        if data is None:
+            info = self._infos[name]
+            # NOTE: a compressed stream is only decompressed from its
+            # start again when members are read backwards
+            with self._archive_lock:
+                if self._archive is None:
+                    self._archive = tarfile.open(self.path, 'r:*')
+                data = self._archive.extractfile(info).read()
+        return six.BytesIO(data)
+
+    def close(self):
+        super(TarLoader, self).close()
+        with self._archive_lock:
+            archive, self._archive = self._archive, None
+        if archive is not None:
+            archive.close()
+
+    def _member_stat(self, info):
+        return info.size, info.mtime
+
+
+PACKAGE_LOADERS = [DirectoryLoader, ZipLoader, TarLoader]
+BUFFER_LOADERS = [ZipBufferLoader]
+
+
+def _load(loaders, package, name, cache, memory_budget):
+    for loader_cls in loaders:
+        loader = loader_cls.try_load(package, cache, memory_budget)
         if loader is not None:
             return loader
     else:
         # FIXME:
-        raise Exception('Cannot load package {0}: Unexpected format')
+        raise Exception('Cannot load package {0}: Unexpected format'
+                        .format(name))
+
+
+def load_buffer(data, cache=None, memory_budget=None):
+    """Loads a package from bytes, a memoryview or a seekable stream"""
+    return _load(BUFFER_LOADERS, data, getattr(data, 'name', BUFFER_NAME),
+                 cache, memory_budget)
+
+
+def load_package(package, cache=None, memory_budget=None):
+    """Loads a package from a path, a bytearray, a memoryview or a stream
+
+    bytes are taken for a path, as on Python 2 they are strings, buffers
+    held in bytes are loaded with load_buffer.
+    """
+    if (isinstance(package, (bytearray, memoryview)) or
+            hasattr(package, 'read')):
+        return load_buffer(package, cache, memory_budget)
+    return _load(PACKAGE_LOADERS, package, package, cache, memory_budget)
+
+
+def _package_children(path):
+    children = []
+    for name in sorted(os.listdir(path)):
+        child = os.path.join(path, name)
+        if os.path.isdir(child) or name.endswith(consts.PACKAGE_EXTENSIONS):
+            children.append(child)
+    return children
+
+
+def _is_catalog(path, children):
+    # NOTE: a package missing its manifest is still a package, it is
+    # validated as one and reported as broken
+    if any(os.path.isdir(os.path.join(path, name))
+           for name in consts.PACKAGE_DIRS):
+        return False
+    return any(not os.path.isdir(child) or
+               os.path.exists(os.path.join(child, consts.MANIFEST_PATH))
+               for child in children)
+
+
+def find_packages(paths, catalog=False):
+    """Expand directories holding several packages into package paths
+
+    A directory is expanded when catalog is True or when it holds
+    archives or directories with manifests, and it does not look like a
+    package itself.
+    """
+    for path in paths:
+        if (not os.path.isdir(path) or
+                os.path.exists(os.path.join(path, consts.MANIFEST_PATH))):
+            yield path
+            continue
+        children = _package_children(path)
+        if catalog or _is_catalog(path, children):
+            for child in children:
+                yield child
+        else:
+            yield path
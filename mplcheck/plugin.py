@@ -13,9 +13,26 @@
 #    under the License.
 
 import abc
+import collections
+import errno
+import glob
+import hashlib
+import importlib
+import json
+import os
+import sys
+import tempfile
 
 import six
 
+from mplcheck import log
+
+LOG = log.get_logger(__name__)
+
+NAMESPACE = 'mpl-check.plugins'
+
+Extension = collections.namedtuple('Extension', ['name', 'obj'])
+
 
 @six.add_metaclass(abc.ABCMeta)
 class Plugin(object):
@@ -27,3 +44,112 @@ class Plugin(object):
     @abc.abstractmethod
     def errors(self):
         pass
+
+
+def _cache_path():
+    cache_home = (os.environ.get('XDG_CACHE_HOME') or
+                  os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(cache_home, 'mplcheck', 'plugins.json')
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _fingerprint(namespace):
+    # NOTE: installing or removing a distribution changes the modification
+    # time of the directory it is installed into. Entry points of editable
+    # installs are rewritten in place, so their files are checked as well
+    digest = hashlib.sha1(namespace.encode('utf-8'))
+    for path in [sys.executable] + sys.path:
+        path = path or os.curdir
+        digest.update(repr((path, _mtime(path))).encode('utf-8'))
+        for pattern in ('*.egg-info', '*.dist-info'):
+            for entry_points in sorted(glob.glob(os.path.join(
+                    path, pattern, 'entry_points.txt'))):
+                digest.update(repr((entry_points, _mtime(entry_points)))
+                              .encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _read_cache(path, fingerprint):
+    try:
+        with open(path) as file_:
+            cached = json.load(file_)
+    except (IOError, OSError, ValueError):
+        return None
+    if (not isinstance(cached, dict) or
+            cached.get('fingerprint') != fingerprint):
+        return None
+    return cached.get('plugins')
+
+
+def _write_cache(path, fingerprint, plugins):
+    dirname = os.path.dirname(path)
+    try:
+        os.makedirs(dirname)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            LOG.debug('Cannot create plugin cache directory %s: %s',
+                      dirname, e)
+            return
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+    except (IOError, OSError) as e:
+        LOG.debug('Cannot write plugin cache %s: %s', path, e)
+        return
+    try:
+        with os.fdopen(fd, 'w') as file_:
+            json.dump({'fingerprint': fingerprint, 'plugins': plugins},
+                      file_)
+        os.rename(tmp_path, path)
+    except (IOError, OSError) as e:
+        LOG.debug('Cannot write plugin cache %s: %s', path, e)
+    finally:
+        # NOTE: the temporary file is only left when it was not renamed
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _load_target(target):
+    module_name, _, attrs = target.partition(':')
+    obj = importlib.import_module(module_name)
+    for attr in attrs.split('.') if attrs else ():
+        obj = getattr(obj, attr)
+    return obj
+
+
+def _scan(namespace, on_load_failure):
+    import stevedore
+    manager = stevedore.ExtensionManager(
+        namespace, invoke_on_load=True, propagate_map_exceptions=True,
+        on_load_failure_callback=on_load_failure)
+    return [Extension(ext.name, ext.obj) for ext in manager], [
+        [ext.name, ext.entry_point_target] for ext in manager]
+
+
+def load_extensions(namespace=NAMESPACE, on_load_failure=None,
+                    cache_path=None):
+    """Load and instantiate plugins registered under namespace
+
+    Entry points are only scanned, which is slow, when installed
+    distributions changed since the previous run. Otherwise plugins are
+    imported straight from the targets remembered in the cache file.
+    """
+    cache_path = cache_path or _cache_path()
+    fingerprint = _fingerprint(namespace)
+    cached = _read_cache(cache_path, fingerprint)
+    if cached is not None:
+        try:
+            return [Extension(name, _load_target(target)())
+                    for name, target in cached]
+        except Exception as e:
+            LOG.debug('Cached plugins are stale: %s', e)
+    extensions, plugins = _scan(namespace, on_load_failure)
+    _write_cache(cache_path, fingerprint, plugins)
+    return extensions
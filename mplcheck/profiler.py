@@ -0,0 +1,135 @@
+#    Copyright (c) 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import timeit
+import types
+
+_timer = timeit.default_timer
+
+_STATS = None
+
+
+class Stats(object):
+    """Time spent in validators and checkers and other counters
+
+    Times are inclusive: time of a validator covers its checkers, time
+    of a checker covers the nested checkers it yields.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = {}
+        self.counters = {}
+
+    def add_time(self, name, seconds, calls=0):
+        with self._lock:
+            timing = self.timings.setdefault(name, [0, 0.0])
+            timing[0] += calls
+            timing[1] += seconds
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self):
+        lines = ['{0:>10} {1:>8}  {2}'.format('seconds', 'calls', 'name')]
+        for name, (calls, seconds) in sorted(
+                self.timings.items(), key=lambda item: -item[1][1]):
+            lines.append('{0:>10.4f} {1:>8}  {2}'.format(seconds, calls,
+                                                         name))
+        for name, value in sorted(self.counters.items()):
+            lines.append('{0}: {1}'.format(name, value))
+        return '\n'.join(lines)
+
+
+def enable():
+    global _STATS
+    _STATS = Stats()
+    return _STATS
+
+
+def disable():
+    global _STATS
+    _STATS = None
+
+
+def get_stats():
+    return _STATS
+
+
+def count(name, value=1):
+    stats = _STATS
+    if stats is not None:
+        stats.count(name, value)
+
+
+def _func_name(func):
+    name = getattr(func, '__name__', None)
+    if name is None:
+        return repr(func)
+    owner = getattr(func, '__self__', None)
+    if owner is not None:
+        return '{0}.{1}'.format(type(owner).__name__, name)
+    return name
+
+
+def call(name, func, *args):
+    """Call func timing it and, if it returns one, the generator
+
+    When name is None it is made of the function and class names.
+    """
+    stats = _STATS
+    if stats is None:
+        return func(*args)
+    if name is None:
+        name = _func_name(func)
+    start = _timer()
+    try:
+        result = func(*args)
+    finally:
+        stats.add_time(name, _timer() - start, calls=1)
+    if isinstance(result, types.GeneratorType):
+        return _timed_iter(stats, name, result)
+    return result
+
+
+def timed_iter(name, func, *args):
+    """Call func timing it and iteration over the result it returns"""
+    stats = _STATS
+    if stats is None:
+        return func(*args)
+    start = _timer()
+    try:
+        result = func(*args)
+    finally:
+        stats.add_time(name, _timer() - start, calls=1)
+    return _timed_iter(stats, name, result)
+
+
+def _timed_iter(stats, name, iterable):
+    # NOTE: errors are flattened by the manager, so nested generators are
+    # wrapped too, otherwise their time would not be accounted
+    iterator = iter(iterable)
+    while True:
+        start = _timer()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            stats.add_time(name, _timer() - start)
+        if isinstance(item, types.GeneratorType):
+            item = _timed_iter(stats, name, item)
+        yield item
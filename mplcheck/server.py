@@ -0,0 +1,144 @@
+#    Copyright (c) 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import errno
+import json
+import os
+import signal
+import socket
+import stat
+import sys
+
+import six
+from six.moves import socketserver
+
+from mplcheck import log
+from mplcheck import manager
+
+LOG = log.get_logger(__name__)
+
+
+class ServerError(Exception):
+    pass
+
+
+def _remove_stale_socket(path):
+    """Removes a socket left behind by a server that is not running"""
+    try:
+        mode = os.stat(path).st_mode
+    except OSError as e:
+        if e.errno == errno.ENOENT:
+            return
+        raise
+    if not stat.S_ISSOCK(mode):
+        raise ServerError('{0} exists and is not a socket'.format(path))
+    client = socket.socket(socket.AF_UNIX)
+    try:
+        client.connect(path)
+    except socket.error as e:
+        if e.errno != errno.ECONNREFUSED:
+            raise
+    else:
+        raise ServerError('Another server is listening on {0}'.format(path))
+    finally:
+        client.close()
+    os.unlink(path)
+
+
+def _codes(value):
+    if not value:
+        return None
+    if isinstance(value, six.string_types):
+        return value.split(',')
+    return list(value)
+
+
+class ValidationHandler(socketserver.StreamRequestHandler):
+    """Serves newline separated JSON requests on a single connection
+
+    Request: {"package": <path>, "select": [<code>, ...],
+              "ignore": [<code>, ...]}
+    Response: {"package": <path>, "errors": [<error>, ...]} or
+              {"error": <message>}
+    """
+
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            response = self.server.process(line)
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class ValidationServer(socketserver.ThreadingMixIn,
+                       socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, cache=None, memory_budget=None):
+        self.socket_path = socket_path
+        self.cache = cache
+        self.memory_budget = memory_budget
+        _remove_stale_socket(socket_path)
+        socketserver.UnixStreamServer.__init__(self, socket_path,
+                                               ValidationHandler)
+        manager.warm_up()
+
+    def process(self, line):
+        try:
+            request = json.loads(line.decode('utf-8'))
+            pkg_path = request['package']
+        except (ValueError, TypeError, KeyError):
+            return {'error': 'Request should be a JSON object with a '
+                             '"package" key'}
+        mgr = None
+        try:
+            mgr = manager.Manager(pkg_path, cache=self.cache,
+                                  memory_budget=self.memory_budget)
+            mgr.load_plugins()
+            errors = mgr.validate(select=_codes(request.get('select')),
+                                  ignore=_codes(request.get('ignore')))
+            # NOTE: snippets are read from the package, so errors are
+            # rendered before it is closed
+            errors = [e.to_dict() for e in errors]
+        except Exception as e:
+            LOG.exception('Validation of %s failed', pkg_path)
+            return {'package': pkg_path, 'error': str(e)}
+        finally:
+            if mgr is not None:
+                mgr.pkg.close()
+        return {'package': pkg_path, 'errors': errors}
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+
+
+def serve(socket_path, cache=None, memory_budget=None):
+    server = ValidationServer(socket_path, cache=cache,
+                              memory_budget=memory_budget)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    LOG.info('Listening on %s', socket_path)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
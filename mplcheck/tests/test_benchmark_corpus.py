@@ -0,0 +1,82 @@
+#    Copyright (c) 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+import six
+
+from mplcheck.benchmark import corpus
+from mplcheck.benchmark import run
+from mplcheck import manager
+from mplcheck import pkg_loader
+
+
+class CorpusTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def _check_package(self, path):
+        pkg = pkg_loader.load_package(path)
+        self.assertEqual(
+            ['Classes/Class0.yaml', 'Classes/Class1.yaml',
+             'Classes/Class2.yaml', 'UI/ui.yaml', 'manifest.yaml'],
+            sorted(pkg.list_files()))
+        for name in pkg.list_files():
+            self.assertIsNotNone(pkg.read(name).yaml())
+        manifest = pkg.read('manifest.yaml').yaml()[0]
+        self.assertEqual(3, len(manifest['Classes']))
+        errors = manager.Manager(path).validate(
+            select=['E050', 'W020', 'E080', 'E081'])
+        self.assertEqual([], errors)
+
+    def test_directory(self):
+        path = corpus.generate(os.path.join(self.path, 'pkg'), classes=3)
+        self._check_package(path)
+
+    def test_zip(self):
+        path = corpus.generate(os.path.join(self.path, 'pkg.zip'),
+                               classes=3, archive=True)
+        self._check_package(path)
+
+    def test_scale(self):
+        files = corpus.package_files(classes=1, methods=4, depth=5, forms=0)
+        self.assertNotIn('UI/ui.yaml', files)
+        content = files['Classes/Class0.yaml']
+        self.assertEqual(4, content.count('Arguments:'))
+        self.assertEqual(4 * 5, content.count('If:'))
+        self.assertEqual(files, corpus.package_files(classes=1, methods=4,
+                                                     depth=5, forms=0))
+
+
+class RunTest(unittest.TestCase):
+
+    @mock.patch('mplcheck.benchmark.run.run_benchmarks')
+    @mock.patch('mplcheck.benchmark.run.version.version_info')
+    def test_unknown_version(self, m_version_info, m_run_benchmarks):
+        m_version_info.version_string.side_effect = Exception('No git')
+        m_run_benchmarks.return_value = [
+            ('load_package', {'best': 1.0, 'median': 2.0})]
+        with mock.patch('sys.stdout', new=six.StringIO()) as m_stdout:
+            run.main(['--json'])
+        report = json.loads(m_stdout.getvalue())
+        self.assertEqual('unknown', report['mplcheck'])
+        self.assertEqual(run.version.source_fingerprint(),
+                         report['mplcheck_source'])
@@ -0,0 +1,97 @@
+#    Copyright (c) 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from mplcheck import cache
+from mplcheck import version
+
+
+class DiskCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        patcher = mock.patch('mplcheck.cache.version.source_fingerprint',
+                             return_value='1.0.0')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_set(self):
+        c = cache.DiskCache(self.path)
+        key = c.key('yaml', b'content')
+        self.assertIsNone(c.get(key))
+        c.set(key, {'a': [1, 2]})
+        self.assertEqual({'a': [1, 2]}, c.get(key))
+        self.assertEqual({'a': [1, 2]},
+                         cache.DiskCache(self.path).get(key))
+
+    def test_key(self):
+        c = cache.DiskCache(self.path)
+        self.assertEqual(c.key('yaml', b'a'), c.key('yaml', u'a'))
+        self.assertNotEqual(c.key('yaml', b'a'), c.key('yaml', b'b'))
+        self.assertNotEqual(c.key('yaml', b'a'), c.key('yaml', b'', b'a'))
+
+    def test_version_in_key(self):
+        key = cache.DiskCache(self.path).key('yaml', b'a')
+        with mock.patch('mplcheck.cache.version.source_fingerprint',
+                        return_value='2.0.0'):
+            self.assertNotEqual(key,
+                                cache.DiskCache(self.path).key('yaml', b'a'))
+
+    def test_broken_entry(self):
+        c = cache.DiskCache(self.path)
+        key = c.key('broken')
+        c.set(key, 'value')
+        with open(c._entry_path(key), 'wb') as file_:
+            file_.write(b'garbage')
+        self.assertIsNone(c.get(key))
+
+    def test_evict(self):
+        c = cache.DiskCache(self.path, max_size=1024 * 1024)
+        keys = [c.key(str(i)) for i in range(4)]
+        for i, key in enumerate(keys):
+            c.set(key, b'x' * 400 * 1024)
+            os.utime(c._entry_path(key), (i, i))
+        c.evict()
+        self.assertIsNone(c.get(keys[0]))
+        self.assertIsNone(c.get(keys[1]))
+        self.assertIsNotNone(c.get(keys[2]))
+        self.assertIsNotNone(c.get(keys[3]))
+
+
+class SourceFingerprintTest(unittest.TestCase):
+
+    def _install(self, content):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        os.makedirs(os.path.join(path, 'checkers'))
+        for name in ('__init__.py', 'checkers/yaql_checker.py'):
+            with open(os.path.join(path, name), 'w') as f:
+                f.write(content)
+        return path
+
+    def test_fingerprint(self):
+        first = self._install('a = 1\n')
+        second = self._install('a = 1\n')
+        os.utime(os.path.join(second, '__init__.py'), (0, 0))
+        self.assertEqual(version._fingerprint(first),
+                         version._fingerprint(second))
+        self.assertNotEqual(version._fingerprint(first),
+                            version._fingerprint(self._install('a = 2\n')))
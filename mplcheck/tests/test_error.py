@@ -0,0 +1,109 @@
+#    Copyright (c) 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import pickle
+import unittest
+
+import mock
+
+from mplcheck import error
+
+
+class CheckErrorTest(unittest.TestCase):
+
+    def _yaml_obj(self):
+
+        class FakeYamlNode(str):
+            pass
+
+        yaml_obj = FakeYamlNode('value')
+        meta = yaml_obj.__yaml_meta__ = mock.Mock()
+        meta.name = 'fake.yaml'
+        meta.line = 1
+        meta.column = 2
+        meta.lines.return_value.line.return_value = 'key: value'
+        return yaml_obj, meta
+
+    def test_report(self):
+        yaml_obj, meta = self._yaml_obj()
+        e = error.report.E007('Fake "{0}"', yaml_obj, args=('value',))
+        self.assertEqual('E007', e.code)
+        self.assertEqual('fake.yaml', e.filename)
+        self.assertEqual(2, e.line)
+        self.assertEqual(3, e.column)
+        self.assertEqual('Fake "value"', e.message)
+
+    def test_lazy_source(self):
+        yaml_obj, meta = self._yaml_obj()
+        lines = meta.lines.return_value
+        e = error.report.E007('Fake', yaml_obj)
+        self.assertFalse(lines.line.called)
+        self.assertEqual('    key: value\n      ^', e.source)
+        self.assertEqual(e.source, e.to_dict()['source'])
+        lines.line.assert_called_once_with(1)
+
+    def test_plain_args(self):
+        yaml_obj, meta = self._yaml_obj()
+        node = {'key': [yaml_obj]}
+        e = error.report.E007('Fake {0} {1} {2}', yaml_obj,
+                              args=(yaml_obj, node, 42))
+        self.assertEqual(('value', str(node), 42), e._args)
+        self.assertIs(str, type(e._args[0]))
+        self.assertEqual('Fake value {0} 42'.format(node), e.message)
+
+    def test_bounded_args(self):
+        small = [{'key': ['a', 1, None]}, ('b',), {}]
+        self.assertEqual(str(small), error.report.E007('{0}',
+                                                       args=(small,)).message)
+        body = [{'Return': 'x' * 10 ** 7}] * 10 ** 6
+        e = error.report.E007('{0}', args=(body,))
+        self.assertEqual(error.MAX_ARG_LENGTH + 3, len(e.message))
+        self.assertEqual("[{'Return': 'xxx", e.message[:16])
+        self.assertEqual('...', e.message[-3:])
+
+    def test_message_without_args(self):
+        self.assertEqual('Fake {0}', error.report.E007('Fake {0}').message)
+
+    def test_compact(self):
+        e = error.report.E007('Fake')
+        self.assertFalse(hasattr(e, '__dict__'))
+
+    def test_pickle(self):
+        yaml_obj, meta = self._yaml_obj()
+        e = error.report.E007('Fake "{0}"', yaml_obj, args=('value',))
+        loaded = pickle.loads(pickle.dumps(e))
+        self.assertEqual(e.to_dict(), loaded.to_dict())
+
+
+class CodeFilterTest(unittest.TestCase):
+
+    def test_filter(self):
+        self.assertTrue(error.CodeFilter()('E001'))
+        self.assertTrue(error.CodeFilter(select=['E001'])('E001'))
+        self.assertFalse(error.CodeFilter(select=['E001'])('E002'))
+        self.assertFalse(error.CodeFilter(ignore=['E001'])('E001'))
+        self.assertFalse(error.CodeFilter(select=['E001'],
+                                          ignore=['E001'])('E001'))
+
+    def test_allows(self):
+        @error.emits('E001', 'W001')
+        def checker(value):
+            pass
+
+        self.assertTrue(error.CodeFilter(select=['W001']).allows(checker))
+        self.assertFalse(error.CodeFilter(select=['E002']).allows(checker))
+        self.assertFalse(error.CodeFilter(
+            ignore=['E001', 'W001']).allows(checker))
+        self.assertTrue(error.CodeFilter(select=['E002']).allows(
+            lambda value: None))
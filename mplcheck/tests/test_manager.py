@@ -12,10 +12,16 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import itertools
+import os
+import shutil
+import tempfile
 import unittest
 
 import mock
 
+from mplcheck.benchmark import corpus
+from mplcheck import cache
 from mplcheck import error
 from mplcheck import manager
 
@@ -47,6 +53,14 @@ class PlainTextFormatterTest(unittest.TestCase):
         errors = [error.report.E007('Fake!!!', fake_yaml_node)]
         self.assertEqual(['fake:1:1: E007 Fake!!!'], formater.format(errors))
 
+    def test_format_without_source(self):
+        lines = mock.Mock()
+        e = error.CheckError('E007', 'Fake {0}', filename='fake', line=2,
+                             column=3, args=('value',), lines=lines)
+        self.assertEqual('fake:2:3: E007 Fake value',
+                         manager.PlainTextFormatter().format_error(e))
+        self.assertFalse(lines.line.called)
+
 
 class ManagerTest(unittest.TestCase):
 
@@ -64,5 +78,307 @@ class ManagerTest(unittest.TestCase):
         ])
         m_pkg = m_pkg_loader.load_package.return_value
         mgr = manager.Manager('fake')
+        mgr.pkg.cache = None
         errors = mgr.validate(validators=[MockValidator])
         self.assertEqual([fake_error, fake_error], errors)
+
+    @mock.patch('mplcheck.manager.pkg_loader')
+    def test_validate_stream(self, m_pkg_loader):
+        e1 = error.report.E007('Fake!')
+        e2 = error.report.E001('Fake!')
+        MockValidator = mock.Mock()
+        m_validator = MockValidator.return_value
+        m_validator.run.return_value = (e for e in [e1, e2])
+        mgr = manager.Manager('fake')
+        mgr.pkg.cache = None
+        errors = mgr.validate(validators=[MockValidator], sort=False)
+        self.assertIs(e1, next(errors))
+        self.assertEqual([e2], list(errors))
+
+    @mock.patch('mplcheck.manager._load_plugins')
+    @mock.patch('mplcheck.manager.pkg_loader')
+    def test_load_plugins(self, m_pkg_loader, m_load_plugins):
+        m_plugin = mock.Mock()
+        m_plugin.obj.validators = [mock.sentinel.validator]
+        m_load_plugins.return_value = [m_plugin]
+        mgr = manager.Manager('fake')
+        mgr.load_plugins()
+        mgr.load_plugins()
+        self.assertEqual(manager.VALIDATORS + [mock.sentinel.validator],
+                         mgr.validators)
+        self.assertNotIn(mock.sentinel.validator, manager.VALIDATORS)
+
+    @mock.patch('mplcheck.manager.pkg_loader')
+    def test_to_list_deep_chain(self, m_pkg_loader):
+        fake_error = error.report.E007('Fake!')
+
+        def nested(depth):
+            yield fake_error
+            if depth:
+                yield nested(depth - 1)
+
+        mgr = manager.Manager('fake')
+        errors = mgr._to_list(iter([nested(5000)]))
+        self.assertEqual(5001, len(errors))
+
+    @mock.patch('mplcheck.manager.pkg_loader')
+    def test_to_list_failed_checker(self, m_pkg_loader):
+        fake_error = error.report.E007('Fake!')
+
+        def broken():
+            yield fake_error
+            raise ValueError()
+
+        mgr = manager.Manager('fake')
+        errors = mgr._to_list(iter([broken(), (e for e in [fake_error])]))
+        self.assertEqual(['E000', 'E007', 'E007'], [e.code for e in errors])
+        errors = mgr._to_list(iter([broken()]), select=['E007'])
+        self.assertEqual(['E007'], [e.code for e in errors])
+
+    @mock.patch('mplcheck.manager.pkg_loader')
+    def test_validate_parallel(self, m_pkg_loader):
+
+        class FakeValidator(object):
+            def __init__(self, pkg):
+                pass
+
+            def files(self):
+                return ['a', 'b', 'c']
+
+            def run_file(self, filename):
+                yield error.report.E007('Fake {0}', args=(filename,))
+                yield (e for e in [error.report.E001(filename)])
+
+            def run(self):
+                return itertools.chain(*[self.run_file(f)
+                                         for f in self.files()])
+
+        mgr = manager.Manager('fake')
+        expected = [e.message for e in mgr.validate(
+            validators=[FakeValidator, FakeValidator], sort=False)]
+        errors = mgr.validate(validators=[FakeValidator, FakeValidator],
+                              sort=False, jobs=3,
+                              executor=manager.THREAD_EXECUTOR)
+        self.assertEqual(expected, [e.message for e in errors])
+        errors = mgr.validate(validators=[FakeValidator], jobs=3,
+                              executor=manager.THREAD_EXECUTOR,
+                              select=['E001'])
+        self.assertEqual(['a', 'b', 'c'], [e.message for e in errors])
+
+    @mock.patch('mplcheck.manager.pkg_loader')
+    def test_validate_cached_results(self, m_pkg_loader):
+        runs = []
+
+        class FakeValidator(object):
+            cacheable = True
+
+            def __init__(self, pkg):
+                pass
+
+            def files(self):
+                return ['a', 'b']
+
+            def run_file(self, filename):
+                runs.append(filename)
+                yield error.report.E007('Fake {0}', args=(filename,))
+                if filename == 'b':
+                    raise ValueError()
+
+        class UncachedValidator(FakeValidator):
+            cacheable = False
+
+        class PluginValidator(FakeValidator):
+            __module__ = 'mpl_plugin.validators'
+
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        mgr = manager.Manager('fake')
+        mgr.pkg.configure_mock(cache=cache.DiskCache(path), path='fake',
+                               format='MuranoPL', version='1.0')
+        mgr.pkg.read.return_value.raw.return_value = b'content'
+
+        for _ in range(2):
+            errors = mgr.validate(validators=[FakeValidator], sort=False)
+            self.assertEqual(['E007', 'E007', 'E000'],
+                             [e.code for e in errors])
+        self.assertEqual(['a', 'b', 'b'], runs)
+
+        errors = mgr.validate(validators=[FakeValidator], ignore=['E000'])
+        self.assertEqual(['Fake a', 'Fake b'], [e.message for e in errors])
+        self.assertEqual(['a', 'b', 'b', 'a', 'b'], runs)
+
+        for validator in (UncachedValidator, PluginValidator):
+            del runs[:]
+            for _ in range(2):
+                mgr.validate(validators=[validator])
+            self.assertEqual(['a', 'b', 'a', 'b'], runs)
+
+    @mock.patch('mplcheck.manager.version.distribution_version')
+    @mock.patch('mplcheck.manager.pkg_loader')
+    def test_cached_results_key(self, m_pkg_loader, m_distribution_version):
+        runs = []
+
+        class FakeValidator(object):
+            cacheable = True
+
+            def __init__(self, pkg):
+                pass
+
+            def files(self):
+                return ['a']
+
+            def run_file(self, filename):
+                runs.append(filename)
+                yield error.report.E007('Fake', filename=filename)
+
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        disk_cache = cache.DiskCache(path)
+        m_distribution_version.return_value = '1.1.0'
+        for pkg_path in ('/ci/1/pkg', '/ci/2/pkg'):
+            mgr = manager.Manager(pkg_path)
+            mgr.pkg.configure_mock(cache=disk_cache, path=pkg_path,
+                                   format='MuranoPL', version='1.0')
+            mgr.pkg.read.return_value.raw.return_value = b'content'
+            errors = mgr.validate(validators=[FakeValidator])
+            self.assertEqual(['a'], [e.filename for e in errors])
+        self.assertEqual(['a'], runs)
+        m_distribution_version.assert_called_with('yaql')
+
+        m_distribution_version.return_value = '1.1.3'
+        mgr.validate(validators=[FakeValidator])
+        self.assertEqual(['a', 'a'], runs)
+
+
+class ParseFilesTest(unittest.TestCase):
+
+    def setUp(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        self.pkg_path = corpus.generate(os.path.join(path, 'pkg'),
+                                        classes=3, methods=2, depth=1)
+
+    def test_validate_parse_jobs(self):
+        expected = manager.Manager(self.pkg_path).validate()
+        mgr = manager.Manager(self.pkg_path)
+        mgr._parse_files(mgr.create_validators(), 2)
+        for filename in ('Classes/Class0.yaml', 'UI/ui.yaml'):
+            wrapper = mgr.pkg.read(filename)
+            self.assertFalse(wrapper.needs_parsing())
+            meta = wrapper.yaml()[0].__yaml_meta__
+            self.assertIs(wrapper, meta.source.file)
+            self.assertEqual(wrapper.name, meta.name)
+        errors = mgr.validate(parse_jobs=2)
+        self.assertEqual([e.to_dict() for e in expected],
+                         [e.to_dict() for e in errors])
+
+    @mock.patch('mplcheck.manager.multiprocessing.Pool')
+    def test_parse_in_batches(self, m_pool):
+        batches = []
+
+        def imap(func, tasks):
+            batches.append([name for name, raw in tasks])
+            return (func(task) for task in tasks)
+        m_pool.return_value.imap.side_effect = imap
+
+        mgr = manager.Manager(self.pkg_path)
+        files = ['Classes/Class0.yaml', 'Classes/Class1.yaml',
+                 'Classes/Class2.yaml']
+        sizes = [len(mgr.pkg.read(name).raw()) for name in files]
+        mgr = manager.Manager(
+            self.pkg_path, memory_budget=(sizes[0] + sizes[1]) *
+            manager.PARSE_BATCH_RATIO)
+        instances = mgr.create_validators()
+        mgr._parse_files(instances, 2)
+        self.assertEqual([[mgr.pkg.read(name).name for name in files[:2]],
+                          [mgr.pkg.read(name).name
+                           for name in files[2:] + ['UI/ui.yaml',
+                                                    'manifest.yaml']]],
+                         batches)
+        m_pool.assert_called_once_with(2)
+        m_pool.return_value.close.assert_called_once_with()
+        m_pool.return_value.join.assert_called_once_with()
+
+
+class BufferTest(unittest.TestCase):
+
+    def setUp(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        self.pkg_path = corpus.generate(os.path.join(path, 'pkg.zip'),
+                                        classes=3, methods=2, depth=1,
+                                        archive=True)
+        with open(self.pkg_path, 'rb') as file_:
+            self.data = file_.read()
+
+    def test_from_buffer(self):
+        expected = [e.to_dict() for e in
+                    manager.Manager(self.pkg_path).validate()]
+        for data in (self.data, memoryview(self.data)):
+            mgr = manager.Manager.from_buffer(data)
+            self.assertTrue(mgr.pkg.in_memory)
+            self.assertEqual(expected,
+                             [e.to_dict() for e in mgr.validate()])
+        with open(self.pkg_path, 'rb') as file_:
+            mgr = manager.Manager.from_buffer(file_)
+            self.assertEqual(self.pkg_path, mgr.pkg.path)
+            self.assertEqual(expected,
+                             [e.to_dict() for e in mgr.validate()])
+
+    @mock.patch('mplcheck.manager.multiprocessing.Pool')
+    def test_process_executor(self, m_pool):
+        expected = manager.Manager(self.pkg_path).validate()
+        mgr = manager.Manager.from_buffer(self.data)
+        errors = mgr.validate(jobs=2, executor=manager.PROCESS_EXECUTOR)
+        self.assertFalse(m_pool.called)
+        self.assertEqual([e.to_dict() for e in expected],
+                         [e.to_dict() for e in errors])
+
+
+class ValidatePackagesTest(unittest.TestCase):
+
+    @mock.patch('mplcheck.manager.warm_up')
+    @mock.patch('mplcheck.manager.Manager')
+    def test_validate_packages(self, m_manager, m_init):
+        fake_error = error.report.E007('Fake!')
+        m_manager.return_value.validate.return_value = [fake_error]
+        results = list(manager.validate_packages(['a', 'b'], select=['E007'],
+                                                 sort=False, jobs=1))
+        self.assertEqual([('a', [fake_error]), ('b', [fake_error])],
+                         results)
+        m_manager.assert_any_call('a', cache=None, memory_budget=None)
+        m_manager.assert_any_call('b', cache=None, memory_budget=None)
+        m_manager.return_value.validate.assert_called_with(
+            select=['E007'], ignore=None, sort=False, jobs=1,
+            executor=manager.THREAD_EXECUTOR, parse_jobs=1)
+        self.assertFalse(m_init.called)
+
+    @mock.patch('mplcheck.manager.Manager')
+    def test_validate_packages_close(self, m_manager):
+        m_pkg = m_manager.return_value.pkg
+        m_manager.return_value.validate.return_value = []
+        for _, errors in manager.validate_packages(['a']):
+            self.assertEqual(1, m_pkg.close.call_count)
+
+        m_pkg.reset_mock()
+        m_manager.return_value.validate.return_value = iter(['e'])
+        for _, errors in manager.validate_packages(['a'], sort=False):
+            self.assertFalse(m_pkg.close.called)
+            self.assertEqual(['e'], list(errors))
+            self.assertEqual(1, m_pkg.close.call_count)
+
+        m_pkg.reset_mock()
+        m_manager.return_value.validate.side_effect = Exception('Broken')
+        list(manager.validate_packages(['a']))
+        self.assertEqual(1, m_pkg.close.call_count)
+
+    @mock.patch('mplcheck.manager.warm_up')
+    @mock.patch('mplcheck.manager.Manager')
+    def test_validate_packages_load_failure(self, m_manager, m_init):
+        m_manager.side_effect = Exception('Broken')
+        results = list(manager.validate_packages(['a']))
+        self.assertEqual(1, len(results))
+        pkg_path, errors = results[0]
+        self.assertEqual('a', pkg_path)
+        self.assertEqual(['E000'], [e.code for e in errors])
+        self.assertEqual('a', errors[0].filename)
@@ -24,6 +24,7 @@ class ManfiestValidatorTests(helpers.BaseValidatorTestClass):
         super(ManfiestValidatorTests, self).setUp()
         self._oe_patcher = mock.patch('os.path.exists')
         self.exists = self._oe_patcher.start()
+        self.addCleanup(self._oe_patcher.stop)
         self.exists.return_value = [True, True]
         self.loaded_package = mock.Mock()
         self.mv = manifest.ManifestValidator(self.loaded_package)
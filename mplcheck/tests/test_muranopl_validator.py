@@ -15,6 +15,7 @@
 from copy import deepcopy
 import mock
 
+from mplcheck import error
 from mplcheck.tests import test_validator_helpers as helpers
 from mplcheck.validators.muranopl import MuranoPLValidator
 
@@ -287,3 +288,23 @@ class MuranoPlTests(helpers.BaseValidatorTestClass):
         self.g = self.mpl_validator._valid_argument_usage('Standard1')
         self.assertIn('Usage is invalid value "Standard1"',
                       next(self.g).message)
+
+    def test_filtered_yaql_is_not_parsed(self):
+        p_dict = deepcopy(MURANOPL_BASE['Properties'])
+        p_dict['ports']['Contract'] = '$.deploy('
+        self.mpl_validator.set_code_filter(
+            error.CodeFilter(ignore=['E042', 'E048']))
+        with mock.patch.object(self.mpl_validator, 'yaql_checker') as m_yaql:
+            self.g = self.mpl_validator._valid_properties(p_dict)
+            list(self.g)
+            self.assertFalse(m_yaql.called)
+
+    def test_filtered_body_is_not_checked(self):
+        m_dict = {'foo': {'Body': '$.deploy('}}
+        self.mpl_validator.set_code_filter(
+            error.CodeFilter(select=['E044']))
+        with mock.patch.object(self.mpl_validator.code_structure,
+                               'codeblock') as m_codeblock:
+            self.g = self.mpl_validator._valid_methods(m_dict)
+            list(self.g)
+            self.assertFalse(m_codeblock.called)
@@ -12,28 +12,101 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import multiprocessing.pool
+import os
+import shutil
+import stat
+import tarfile
+import tempfile
 import unittest
+import zipfile
 
 import mock
+import six
 
 from mplcheck import consts
+from mplcheck import error
 from mplcheck import pkg_loader
+from mplcheck import yaml_loader
+
+
+def _open_with(data):
+    return lambda path: mock.mock_open(read_data=data)()
 
 
 class FileWrapperTest(unittest.TestCase):
 
     def test_file_wrapper(self):
-        fake_pkg = mock.Mock()
-        fake_pkg.open_file.side_effect = lambda f: mock.mock_open(read_data='text')()
-        f = pkg_loader.FileWrapper(fake_pkg, 'fake_path')
+        fake_pkg = mock.Mock(cache=None)
+        fake_pkg.open_file.side_effect = _open_with('text')
+        f = pkg_loader.FileWrapper(fake_pkg, 'fake_path.yaml')
         self.assertEqual('text', f.raw())
         self.assertEqual(['text'], f.yaml())
 
-        fake_pkg.open_file.side_effect = lambda f: mock.mock_open(read_data='!@#$%')()
-        f = pkg_loader.FileWrapper(fake_pkg, 'fake_path')
+        fake_pkg.open_file.side_effect = _open_with('!@#$%')
+        f = pkg_loader.FileWrapper(fake_pkg, 'fake_path.yaml')
         self.assertEqual('!@#$%', f.raw())
         self.assertEqual(None, f.yaml())
 
+    def test_file_wrapper_reads_once(self):
+        fake_pkg = mock.Mock(cache=None)
+        fake_pkg.open_file.side_effect = _open_with('a: b')
+        f = pkg_loader.FileWrapper(fake_pkg, 'fake_path.yaml')
+        with mock.patch('mplcheck.pkg_loader.yaml.load_all') as m_load:
+            m_load.return_value = iter([{'a': 'b'}])
+            self.assertEqual([{'a': 'b'}], f.yaml())
+            self.assertEqual([{'a': 'b'}], f.yaml())
+            m_load.assert_called_once_with(mock.ANY, mock.ANY)
+        fake_pkg.open_file.assert_called_once_with('fake_path.yaml')
+
+    def test_file_wrapper_not_yaml(self):
+        fake_pkg = mock.Mock(cache=None)
+        fake_pkg.open_file.side_effect = _open_with('a: b')
+        f = pkg_loader.FileWrapper(fake_pkg, 'script.sh')
+        with mock.patch('mplcheck.pkg_loader.yaml.load_all') as m_load:
+            self.assertEqual('a: b', f.raw())
+            self.assertIsNone(f.yaml())
+            self.assertFalse(m_load.called)
+
+    def test_file_wrapper_cache(self):
+        fake_pkg = mock.Mock()
+        fake_pkg.open_file.side_effect = _open_with('a: b')
+        fake_pkg.cache.get.return_value = None
+        f = pkg_loader.FileWrapper(fake_pkg, 'fake_path.yaml')
+        self.assertEqual([{'a': 'b'}], f.yaml())
+        key = fake_pkg.cache.key.return_value
+        fake_pkg.cache.set.assert_called_once_with(key, (mock.ANY,
+                                                         [{'a': 'b'}]))
+
+        source = yaml_loader.YamlSource(None)
+        fake_pkg.cache.get.return_value = (source, [{'c': 'd'}])
+        f = pkg_loader.FileWrapper(fake_pkg, 'fake_path.yaml')
+        with mock.patch('mplcheck.pkg_loader.yaml.load_all') as m_load:
+            self.assertEqual([{'c': 'd'}], f.yaml())
+            self.assertFalse(m_load.called)
+        self.assertIs(f, source.file)
+
+    def _file_wrapper(self, data):
+        fake_pkg = mock.Mock(cache=None)
+        fake_pkg.open_file.side_effect = (
+            lambda f: mock.mock_open(read_data=data)())
+        return pkg_loader.FileWrapper(fake_pkg, 'fake_path.yaml')
+
+    def test_file_wrapper_lines(self):
+        for data in (u'a\r\nbc\n\n\u2028d', b'a\r\nbc\n\n\xe2\x80\xa8d'):
+            f = self._file_wrapper(data)
+            self.assertEqual([u'a', u'bc', u'', u'', u'd'],
+                             [f.line(i) for i in range(5)])
+            self.assertEqual((3, 5), f.line_range(1))
+            self.assertIsNone(f.line(5))
+            self.assertIsNone(f.line_range(-1))
+
+    def test_file_wrapper_snippet(self):
+        f = self._file_wrapper(b'a:\n  b: [c, d]\n')
+        data = f.yaml()[0]
+        self.assertEqual('      b: [c, d]\n         ^',
+                         data['a']['b'].__yaml_meta__.get_snippet())
+
 
 class FakeLoader(pkg_loader.BaseLoader):
 
@@ -48,11 +121,80 @@ class FakeLoader(pkg_loader.BaseLoader):
         if name == consts.MANIFEST_PATH:
             return True
 
-    def list_files(self, subdir=None):
-        if subdir is None:
-            return ['1.yaml', '2.sh', 'sub/3.yaml']
-        else:
-            return ['3.yaml']
+    def _scan(self, roots=None):
+        return [('1.yaml', None), ('2.sh', None), ('sub/3.yaml', None)]
+
+
+class FileIndexTest(unittest.TestCase):
+
+    def test_index(self):
+        index = pkg_loader.FileIndex([('b/1', (1, 0)), ('a', None),
+                                      ('b/2', (2, 0)), ('bc', None)])
+        self.assertEqual(('a', 'b/1', 'b/2', 'bc'), index.names)
+        self.assertEqual(4, len(index))
+        self.assertIn('b/1', index)
+        self.assertNotIn('b', index)
+        self.assertEqual((2, 0), index.stat('b/2'))
+        self.assertIsNone(index.stat('a'))
+        self.assertEqual(('b/1', 'b/2'), index.names_under('b/'))
+        self.assertEqual((), index.names_under('c/'))
+
+
+class FileCacheTest(unittest.TestCase):
+
+    def test_eviction(self):
+        files = pkg_loader.FileCache(100, protected_ratio=0.5)
+        files.set('a', 'A', 30)
+        files.set('b', 'B', 30)
+        self.assertEqual('A', files.get('a'))
+        # NOTE: a scan over files read once does not evict protected ones
+        for name in 'cdef':
+            files.set(name, name.upper(), 30)
+        self.assertEqual(['a', 'e', 'f'], sorted(files._sizes))
+        self.assertEqual(90, files.size)
+        self.assertIsNone(files.get('b'))
+
+    def test_protected_overflow(self):
+        files = pkg_loader.FileCache(100, protected_ratio=0.7)
+        for name in 'abc':
+            files.set(name, name.upper(), 30)
+            files.get(name)
+        self.assertEqual(['b', 'c'], list(files._protected))
+        self.assertEqual(['a'], list(files._probation))
+        files.set('d', 'D', 30)
+        self.assertNotIn('a', files)
+        self.assertEqual(90, files.size)
+
+    def test_resize(self):
+        files = pkg_loader.FileCache(100)
+        files.set('a', 'A', 10)
+        files.set('b', 'B', 10)
+        files.resize('a', 'other', 50)
+        self.assertEqual(20, files.size)
+        files.resize('a', 'A', 95)
+        self.assertEqual(['a'], list(files._sizes))
+        self.assertEqual(95, files.size)
+        files.pop('a')
+        files.pop('a')
+        self.assertEqual(0, files.size)
+        self.assertEqual(0, len(files))
+
+    def test_loader_budget(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        for name in ('a.yaml', 'b.yaml'):
+            with open(os.path.join(path, name), 'w') as f:
+                f.write('a: [b, c]\n')
+        pkg = pkg_loader.DirectoryLoader.try_load(path, memory_budget=1000)
+        self.assertEqual(1000, pkg.memory_budget)
+        file_ = pkg.read('a.yaml')
+        self.assertEqual(10, pkg._cached_files.size)
+        file_.yaml()
+        self.assertEqual(10 + 6 * pkg_loader.NODE_SIZE, file_.size())
+        self.assertEqual(file_.size(), pkg._cached_files.size)
+        self.assertIs(file_, pkg.read('a.yaml'))
+        pkg.read('b.yaml').yaml()
+        self.assertEqual(['b.yaml'], list(pkg._cached_files._sizes))
 
 
 class BaseLoaderTest(unittest.TestCase):
@@ -70,6 +212,7 @@ class BaseLoaderTest(unittest.TestCase):
         m_file_wrapper = mock.Mock()
         m_file = m_file_wrapper.return_value
         m_file.yaml.return_value = {'Format': 'Fake/42'}
+        m_file.size.return_value = 0
         with mock.patch('mplcheck.pkg_loader.FileWrapper', m_file_wrapper):
             m_load.return_value = FakeLoader('fake')
             loader = FakeLoader.try_load('fake')
@@ -80,14 +223,15 @@ class BaseLoaderTest(unittest.TestCase):
     def test_search_for(self):
         fake = FakeLoader('fake')
         self.assertEqual(['1.yaml', 'sub/3.yaml'],
-                         list(fake.search_for('.*\.yaml$')))
+                         list(fake.search_for(r'.*\.yaml$')))
         self.assertEqual(['3.yaml'],
-                         list(fake.search_for('.*\.yaml$', subdir='sub')))
+                         list(fake.search_for(r'.*\.yaml$', subdir='sub')))
 
     def test_read(self):
         fake = FakeLoader('fake')
         m_file_wrapper = mock.Mock()
         m_file = m_file_wrapper.return_value
+        m_file.size.return_value = 0
         with mock.patch('mplcheck.pkg_loader.FileWrapper', m_file_wrapper):
             loaded = fake.read('fake')
             self.assertEqual(m_file, loaded)
@@ -120,18 +264,87 @@ class DirectoryLoaderTest(unittest.TestCase):
     def test_list_files(self):
         #NOTE(sslypushenko) Using mock.patch here as decorator breaks pdb
         pkg = self._load_fake_pkg()
-        with mock.patch('mplcheck.pkg_loader.os.walk') as m_walk:
+        with mock.patch('mplcheck.pkg_loader._scandir', None), \
+                mock.patch('mplcheck.pkg_loader.os.stat') as m_stat, \
+                mock.patch('mplcheck.pkg_loader.os.walk') as m_walk:
+            m_stat.return_value.st_size = 1
+            m_stat.return_value.st_mtime = 2
+            m_stat.return_value.st_mode = stat.S_IFREG
             m_walk.return_value = (item for item in [
                 ('fake', ['subdir'], ['1', '2']),
                 ('fake/subdir', [], ['3', '4']),
             ])
             self.assertEqual(['1', '2', 'subdir/3', 'subdir/4'],
                              pkg.list_files())
-            m_walk.return_value = (item for item in [
-                ('fake/subdir', [], ['3', '4']),
-            ])
             self.assertEqual(['3', '4'],
                              pkg.list_files(subdir='subdir'))
+            self.assertEqual((1, 2), pkg.file_index().stat('subdir/3'))
+            m_walk.assert_called_once_with('fake/')
+
+    def test_list_files_scandir(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        os.makedirs(os.path.join(path, 'Classes', 'sub'))
+        for name in ('manifest.yaml', 'Classes/a.yaml', 'Classes/sub/b.yaml'):
+            with open(os.path.join(path, name), 'w') as f:
+                f.write('a: b\n')
+        pkg = pkg_loader.DirectoryLoader(path)
+        self.assertEqual(['Classes/a.yaml', 'Classes/sub/b.yaml',
+                          'manifest.yaml'], pkg.list_files())
+        self.assertEqual(['a.yaml', 'sub/b.yaml'],
+                         pkg.list_files('Classes/'))
+        self.assertEqual(5, pkg.file_index().stat('manifest.yaml')[0])
+        index = pkg.file_index()
+        self.assertIs(index, pkg.file_index())
+        pkg.invalidate(['manifest.yaml'])
+        self.assertIsNot(index, pkg.file_index())
+
+    @unittest.skipIf(not hasattr(os, 'symlink'), 'os.symlink is missing')
+    def test_list_files_symlinks(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        os.makedirs(os.path.join(path, 'Resources'))
+        for name in (consts.MANIFEST_PATH, 'Resources/run.sh'):
+            with open(os.path.join(path, name), 'w') as f:
+                f.write('a: b\n')
+        os.symlink('..', os.path.join(path, 'Resources', 'up'))
+        os.symlink('run.sh', os.path.join(path, 'Resources', 'link.sh'))
+        os.symlink('missing', os.path.join(path, 'Resources', 'broken'))
+        expected = ['Resources/broken', 'Resources/link.sh',
+                    'Resources/run.sh', consts.MANIFEST_PATH]
+        self.assertEqual(expected,
+                         pkg_loader.DirectoryLoader(path).list_files())
+        with mock.patch('mplcheck.pkg_loader._scandir', None):
+            self.assertEqual(expected,
+                             pkg_loader.DirectoryLoader(path).list_files())
+
+    @unittest.skipIf(pkg_loader._scandir is None, 'os.scandir is missing')
+    def test_list_files_roots(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        for dirname in ('Classes', 'Resources', 'UI'):
+            os.makedirs(os.path.join(path, dirname))
+        for name in ('manifest.yaml', 'Classes/a.yaml', 'Resources/r.sh',
+                     'UI/ui.yaml'):
+            with open(os.path.join(path, name), 'w') as f:
+                f.write('a: b\n')
+        pkg = pkg_loader.DirectoryLoader(path)
+        with mock.patch('mplcheck.pkg_loader._scandir',
+                        side_effect=pkg_loader._scandir) as m_scandir:
+            self.assertEqual(['Classes/a.yaml', 'manifest.yaml'],
+                             pkg.list_files(roots=['manifest.yaml',
+                                                   'Classes/', 'logo.png']))
+            self.assertEqual(['a.yaml'],
+                             list(pkg.search_for(r'.*\.yaml$', 'Classes')))
+        m_scandir.assert_called_once_with(os.path.join(path, 'Classes/'))
+        self.assertEqual(['ui.yaml'], pkg.list_files('UI', roots=['ui.yaml']))
+        with open(os.path.join(path, 'Classes/b.yaml'), 'w') as f:
+            f.write('a: b\n')
+        self.assertEqual(
+            [('Classes/a.yaml', 5), ('Classes/b.yaml', 5),
+             ('manifest.yaml', 5)],
+            sorted((name, st[0]) for name, st in
+                   pkg.stat_files(['Classes/', 'manifest.yaml'])))
 
     def test_exist(self):
         #NOTE(sslypushenko) Using mock.patch here as decorator breaks pdb
@@ -141,3 +354,291 @@ class DirectoryLoaderTest(unittest.TestCase):
             self.assertTrue(pkg.exists('1.yaml'))
             m_exists.return_value = False
             self.assertFalse(pkg.exists('1.yaml'))
+
+
+class FileRefTest(unittest.TestCase):
+
+    def test_error_snippet(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        with open(os.path.join(path, 'a.yaml'), 'w') as f:
+            f.write('a:\n  b: [c, d]\n')
+        pkg = pkg_loader.DirectoryLoader(path)
+        node = pkg.read('a.yaml').yaml()[0]['a']['b']
+        e = error.report.E007('Fake {0}', node, args=(node,))
+        self.assertIsInstance(e._lines, pkg_loader.FileRef)
+        self.assertEqual(("['c', 'd']",), e._args)
+        pkg.invalidate(['a.yaml'])
+        self.assertEqual('      b: [c, d]\n         ^', e.source)
+
+    def test_detach_on_close(self):
+        fd, path = tempfile.mkstemp(suffix='.zip')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        with zipfile.ZipFile(path, 'w') as zf:
+            zf.writestr('a.yaml', 'a:\n  b: [c, d]\n')
+            zf.writestr('b.yaml', 'b: c\n')
+        pkg = pkg_loader.ZipLoader(path)
+        node = pkg.read('a.yaml').yaml()[0]['a']['b']
+        errors = [error.report.E007('Fake', node) for _ in range(2)]
+        self.assertIs(errors[0]._lines, errors[1]._lines)
+        error.report.E007('Fake', pkg.read('b.yaml').yaml()[0])
+        pkg.invalidate(['a.yaml', 'b.yaml'])
+        with mock.patch.object(pkg, 'open_file',
+                               wraps=pkg.open_file) as m_open_file:
+            pkg.close()
+        m_open_file.assert_called_once_with('a.yaml')
+        ref = errors[0]._lines
+        self.assertIsNone(ref.pkg)
+        self.assertEqual([], pkg._handles)
+        self.assertEqual('      b: [c, d]\n         ^', errors[0].source)
+        self.assertEqual([], pkg._handles)
+
+
+class ZipLoaderTest(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.zip')
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+        with zipfile.ZipFile(self.path, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr(consts.MANIFEST_PATH, 'Format: MuranoPL/1.0\n')
+            zf.writestr('Classes/', '')
+            zf.writestr('Classes/a.yaml', 'Name: a\n')
+            zf.writestr('Resources/scripts/run.sh', 'true\n')
+
+    def test_index(self):
+        pkg = pkg_loader.ZipLoader(self.path)
+        self.assertEqual(['Classes/a.yaml', 'Resources/scripts/run.sh',
+                          'manifest.yaml'], pkg.list_files())
+        self.assertEqual(['scripts/run.sh'], pkg.list_files('Resources'))
+        self.assertEqual(['a.yaml'],
+                         list(pkg.search_for(r'.*\.yaml$', 'Classes')))
+        self.assertEqual(8, pkg.file_index().stat('Classes/a.yaml')[0])
+        self.assertEqual(zipfile.ZIP_DEFLATED,
+                         pkg.member_info('Classes/a.yaml').compress_type)
+
+    def test_exists(self):
+        pkg = pkg_loader.ZipLoader(self.path)
+        for name in (consts.MANIFEST_PATH, 'Classes', 'Classes/',
+                     'Resources', 'Resources/scripts/'):
+            self.assertTrue(pkg.exists(name), name)
+        for name in ('Class', 'Resources/scripts/run', 'UI', ''):
+            self.assertFalse(pkg.exists(name), name)
+
+    def test_open_file(self):
+        pkg = pkg_loader.ZipLoader(self.path)
+        self.assertEqual(b'Name: a\n', pkg.read('Classes/a.yaml').raw())
+        self.assertRaises(KeyError, pkg.open_file, 'missing.yaml')
+
+    def test_thread_handles(self):
+        pkg = pkg_loader.ZipLoader(self.path)
+        self.addCleanup(pkg.close)
+        names = pkg.list_files() * 20
+        pool = multiprocessing.pool.ThreadPool(4)
+        self.addCleanup(pool.terminate)
+
+        def read(name):
+            with pkg.open_file(name) as file_:
+                return pkg._open_archive(), file_.read()
+        results = pool.map(read, names)
+        for name, (handle, data) in zip(names, results):
+            with zipfile.ZipFile(self.path) as zf:
+                self.assertEqual(zf.read(name), data)
+        handles = set(id(handle) for handle, data in results)
+        self.assertTrue(1 <= len(handles) <= 5)
+        self.assertNotIn(id(pkg._open_archive()), handles)
+
+    def test_close(self):
+        pkg = pkg_loader.ZipLoader(self.path)
+        handle = pkg._open_archive()
+        pkg.close()
+        self.assertIsNone(handle.fp)
+        self.assertIsNot(handle, pkg._open_archive())
+        pkg.close()
+
+
+class ZipBufferLoaderTest(unittest.TestCase):
+
+    def setUp(self):
+        stream = six.BytesIO()
+        with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr(consts.MANIFEST_PATH, 'Format: MuranoPL/1.0\n')
+            zf.writestr('Classes/a.yaml', 'Name: a\n' * 100)
+        self.data = stream.getvalue()
+
+    def test_load_buffer(self):
+        for data in (bytearray(self.data), memoryview(self.data)):
+            pkg = pkg_loader.load_package(data)
+            self.assertIsInstance(pkg, pkg_loader.ZipBufferLoader)
+            self.assertEqual(pkg_loader.BUFFER_NAME, pkg.path)
+            self.assertEqual(['Classes/a.yaml', 'manifest.yaml'],
+                             pkg.list_files())
+            self.assertEqual(b'Name: a\n' * 100,
+                             pkg.read('Classes/a.yaml').raw())
+        with mock.patch.object(pkg_loader.DirectoryLoader,
+                               'try_load') as m_load:
+            pkg = pkg_loader.load_buffer(self.data)
+        self.assertFalse(m_load.called)
+        self.assertIsInstance(pkg, pkg_loader.ZipBufferLoader)
+
+    def test_load_stream(self):
+        stream = six.BytesIO(self.data)
+        pkg = pkg_loader.load_package(stream)
+        self.assertTrue(pkg.in_memory)
+        handle = pkg._open_archive()
+        pool = multiprocessing.pool.ThreadPool(2)
+        self.addCleanup(pool.terminate)
+        self.assertEqual([handle] * 2,
+                         pool.map(lambda _: pkg._open_archive(), range(2)))
+        self.assertEqual(b'Format: MuranoPL/1.0\n',
+                         pkg.read(consts.MANIFEST_PATH).raw())
+
+    def test_load_stream_threads(self):
+        stream = six.BytesIO()
+        with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for i in range(20):
+                zf.writestr('Classes/{0}.yaml'.format(i),
+                            'Name: {0}\n'.format(i) * 1000)
+        unlocked_reads = []
+
+        class CheckedStream(six.BytesIO):
+
+            def read(self, *args):
+                if pkg is not None and not pkg._stream_lock.locked():
+                    unlocked_reads.append(args)
+                return six.BytesIO.read(self, *args)
+
+        pkg = None
+        pkg = pkg_loader.load_buffer(CheckedStream(stream.getvalue()))
+        names = pkg.list_files() * 5
+        pool = multiprocessing.pool.ThreadPool(4)
+        self.addCleanup(pool.terminate)
+
+        def read(name):
+            with pkg.open_file(name) as file_:
+                return file_.read()
+        results = pool.map(read, names)
+        with zipfile.ZipFile(stream) as zf:
+            self.assertEqual([zf.read(name) for name in names], results)
+        self.assertEqual([], unlocked_reads)
+
+    def test_load_invalid(self):
+        self.assertRaises(Exception, pkg_loader.load_buffer, b'not a zip')
+
+    def test_buffer_file(self):
+        file_ = pkg_loader._BufferFile(memoryview(b'0123456789'))
+        self.assertEqual(b'012', file_.read(3))
+        self.assertEqual(8, file_.seek(-2, os.SEEK_END))
+        self.assertEqual(b'89', file_.read())
+        self.assertEqual(b'', file_.read(1))
+        file_.seek(-5, os.SEEK_CUR)
+        self.assertEqual(5, file_.tell())
+        self.assertRaises(ValueError, file_.seek, -1)
+
+
+class TarLoaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        files = {consts.MANIFEST_PATH: b'Format: MuranoPL/1.0\n',
+                 'Classes/a.yaml': b'Name: a\n',
+                 'Resources/big.yaml': b'a: b\n' * 1024,
+                 'Resources/run.sh': b'true\n',
+                 'Resources/image.qcow2': b'\0' * 4096}
+        self.archive = os.path.join(self.path, 'package.tar.gz')
+        with tarfile.open(self.archive, 'w:gz') as archive:
+            for name in sorted(files):
+                info = tarfile.TarInfo('./' + name)
+                info.size = len(files[name])
+                archive.addfile(info, six.BytesIO(files[name]))
+        self.files = files
+
+    def test_load(self):
+        with mock.patch('mplcheck.pkg_loader.MAX_MEMORY_MEMBER_SIZE', 1024):
+            pkg = pkg_loader.load_package(self.archive)
+        self.assertIsInstance(pkg, pkg_loader.TarLoader)
+        self.assertEqual(sorted(self.files), pkg.list_files())
+        self.assertEqual(['a.yaml'], list(pkg.search_for('.*', 'Classes')))
+        self.assertEqual(sorted([consts.MANIFEST_PATH, 'Classes/a.yaml']),
+                         sorted(pkg._data))
+        for name, data in self.files.items():
+            self.assertEqual(data, pkg.read(name).raw())
+        self.assertEqual(4096, pkg.member_info('Resources/image.qcow2').size)
+
+    def test_large_members_share_archive(self):
+        pkg = pkg_loader.TarLoader(self.archive)
+        names = ['Resources/image.qcow2', 'Resources/run.sh']
+        with mock.patch('mplcheck.pkg_loader.tarfile.open',
+                        wraps=tarfile.open) as m_open:
+            for name in names * 2:
+                with pkg.open_file(name) as file_:
+                    self.assertEqual(self.files[name], file_.read())
+        m_open.assert_called_once_with(self.archive, 'r:*')
+        archive = pkg._archive
+        pkg.close()
+        self.assertIsNone(pkg._archive)
+        self.assertTrue(archive.closed)
+        pkg.close()
+
+    def test_exists(self):
+        pkg = pkg_loader.TarLoader(self.archive)
+        for name in ('Classes', 'Resources/', 'Classes/a.yaml'):
+            self.assertTrue(pkg.exists(name), name)
+        for name in ('UI', '.', 'Classes/b.yaml'):
+            self.assertFalse(pkg.exists(name), name)
+
+    def test_try_load(self):
+        self.assertIsNone(pkg_loader.TarLoader.try_load(self.path))
+        path = os.path.join(self.path, 'manifest.yaml')
+        with open(path, 'w') as f:
+            f.write('Format: MuranoPL/1.0\n')
+        self.assertIsNone(pkg_loader.TarLoader.try_load(path))
+
+
+class FindPackagesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def _touch(self, *parts):
+        path = os.path.join(self.path, *parts)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        open(path, 'w').close()
+
+    def test_package_dir(self):
+        self._touch(consts.MANIFEST_PATH)
+        self.assertEqual([self.path],
+                         list(pkg_loader.find_packages([self.path])))
+
+    def test_catalog_dir(self):
+        self._touch('app', consts.MANIFEST_PATH)
+        self._touch('lib.zip')
+        self._touch('lib2.tar.gz')
+        self._touch('README')
+        self.assertEqual([os.path.join(self.path, 'app'),
+                          os.path.join(self.path, 'lib.zip'),
+                          os.path.join(self.path, 'lib2.tar.gz'),
+                          'other.zip'],
+                         list(pkg_loader.find_packages([self.path,
+                                                        'other.zip'])))
+
+    def test_package_without_manifest(self):
+        self._touch('Classes', 'a.yaml')
+        self._touch('UI', 'ui.yaml')
+        self._touch('Resources', 'lib.zip')
+        self.assertEqual([self.path],
+                         list(pkg_loader.find_packages([self.path])))
+
+    def test_plain_dir(self):
+        self._touch('a', 'README')
+        self._touch('b', 'README')
+        self.assertEqual([self.path],
+                         list(pkg_loader.find_packages([self.path])))
+        self.assertEqual([os.path.join(self.path, 'a'),
+                          os.path.join(self.path, 'b')],
+                         list(pkg_loader.find_packages([self.path],
+                                                       catalog=True)))
@@ -0,0 +1,99 @@
+#    Copyright (c) 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from mplcheck import plugin
+
+
+class FakePlugin(object):
+    validators = []
+
+
+TARGET = 'mplcheck.tests.test_plugin:FakePlugin'
+
+
+class LoadExtensionsTest(unittest.TestCase):
+
+    def setUp(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        self.cache_path = os.path.join(path, 'mplcheck', 'plugins.json')
+        patcher = mock.patch('mplcheck.plugin._scan')
+        self.m_scan = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.m_scan.return_value = (
+            [plugin.Extension('fake', FakePlugin())], [['fake', TARGET]])
+
+    def _load(self):
+        return plugin.load_extensions(cache_path=self.cache_path)
+
+    def test_scan_is_cached(self):
+        extensions = self._load()
+        self.assertEqual(1, self.m_scan.call_count)
+        self.assertTrue(os.path.exists(self.cache_path))
+        self.assertEqual(['fake'], [ext.name for ext in extensions])
+
+        extensions = self._load()
+        self.assertEqual(1, self.m_scan.call_count)
+        self.assertEqual(['fake'], [ext.name for ext in extensions])
+        self.assertIsInstance(extensions[0].obj, FakePlugin)
+
+    def test_installed_distributions_changed(self):
+        self._load()
+        with mock.patch('mplcheck.plugin._fingerprint',
+                        return_value='changed'):
+            self._load()
+        self.assertEqual(2, self.m_scan.call_count)
+
+    def test_stale_cache(self):
+        self.m_scan.return_value = ([], [['gone', 'mplcheck.gone:Plugin']])
+        self._load()
+        self.assertEqual([], self._load())
+        self.assertEqual(2, self.m_scan.call_count)
+
+    def test_no_plugins(self):
+        self.m_scan.return_value = ([], [])
+        self.assertEqual([], self._load())
+        self.assertEqual([], self._load())
+        self.assertEqual(1, self.m_scan.call_count)
+
+    def test_failed_write_leaves_no_files(self):
+        with mock.patch('mplcheck.plugin.json.dump',
+                        side_effect=IOError('No space left')):
+            self._load()
+        self.assertEqual([], os.listdir(os.path.dirname(self.cache_path)))
+
+
+class FingerprintTest(unittest.TestCase):
+
+    def test_entry_points_changed(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        os.makedirs(os.path.join(path, 'plugin.egg-info'))
+        entry_points = os.path.join(path, 'plugin.egg-info',
+                                    'entry_points.txt')
+        with open(entry_points, 'w') as f:
+            f.write('[mpl-check.plugins]\n')
+        os.utime(path, (1, 1))
+        with mock.patch('sys.path', [path]):
+            fingerprint = plugin._fingerprint('ns')
+            os.utime(entry_points, (1, 1))
+            os.utime(path, (1, 1))
+            self.assertNotEqual(fingerprint, plugin._fingerprint('ns'))
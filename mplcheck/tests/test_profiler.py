@@ -0,0 +1,83 @@
+#    Copyright (c) 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import types
+import unittest
+
+import mock
+
+from mplcheck.checkers import yaql_checker
+from mplcheck import profiler
+
+
+class Checker(object):
+
+    def check(self, value):
+        yield value
+        yield (v for v in [value + 1])
+
+
+class ProfilerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(profiler.disable)
+        self.timer = mock.patch('mplcheck.profiler._timer',
+                                side_effect=range(1000)).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_disabled(self):
+        func = mock.Mock(return_value=iter([]))
+        self.assertIs(func.return_value, profiler.call(None, func, 1))
+        self.assertIs(func.return_value,
+                      profiler.timed_iter('name', func, 1))
+        profiler.count('counter')
+        self.assertIsNone(profiler.get_stats())
+        self.assertFalse(self.timer.called)
+
+    def test_call_nested_generators(self):
+        stats = profiler.enable()
+        result = profiler.call(None, Checker().check, 1)
+        self.assertIsInstance(result, types.GeneratorType)
+        self.assertEqual(1, next(result))
+        nested = next(result)
+        self.assertIsInstance(nested, types.GeneratorType)
+        self.assertEqual([2], list(nested))
+        self.assertEqual([], list(result))
+        # one call and five next() calls, each measured as one second
+        self.assertEqual({'Checker.check': [1, 6.0]}, stats.timings)
+
+    def test_timed_iter(self):
+        stats = profiler.enable()
+        result = profiler.timed_iter('validator', list, [1, 2])
+        self.assertEqual([1, 2], list(result))
+        self.assertEqual({'validator': [1, 4.0]}, stats.timings)
+
+    def test_counters(self):
+        stats = profiler.enable()
+        checker = yaql_checker.YaqlChecker()
+        checker('$.not_parsed_by_other_tests_yet()')
+        checker('$.not_parsed_by_other_tests_yet()')
+        profiler.count('bytes', 10)
+        profiler.count('bytes', 5)
+        self.assertEqual({'yaql parses': 1, 'bytes': 15}, stats.counters)
+
+    def test_report(self):
+        stats = profiler.Stats()
+        stats.add_time('fast', 1.0, calls=2)
+        stats.add_time('slow', 3.0, calls=1)
+        stats.count('bytes', 7)
+        lines = stats.report().splitlines()
+        self.assertEqual(['slow', 'fast'],
+                         [line.split()[-1] for line in lines[1:3]])
+        self.assertEqual('bytes: 7', lines[3])
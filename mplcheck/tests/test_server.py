@@ -0,0 +1,128 @@
+#    Copyright (c) 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+import mock
+
+from mplcheck import error
+from mplcheck import server
+
+
+class RemoveStaleSocketTest(unittest.TestCase):
+
+    def setUp(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        self.path = os.path.join(path, 'mpl.sock')
+
+    def _bind(self):
+        sock = socket.socket(socket.AF_UNIX)
+        self.addCleanup(sock.close)
+        sock.bind(self.path)
+        return sock
+
+    def test_missing(self):
+        server._remove_stale_socket(self.path)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_regular_file(self):
+        with open(self.path, 'w') as f:
+            f.write('data')
+        self.assertRaises(server.ServerError,
+                          server._remove_stale_socket, self.path)
+        with open(self.path) as f:
+            self.assertEqual('data', f.read())
+
+    def test_stale_socket(self):
+        self._bind().close()
+        server._remove_stale_socket(self.path)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_live_socket(self):
+        self._bind().listen(1)
+        self.assertRaises(server.ServerError,
+                          server._remove_stale_socket, self.path)
+        self.assertTrue(os.path.exists(self.path))
+
+
+class ValidationServerTest(unittest.TestCase):
+
+    def setUp(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        self.socket_path = os.path.join(path, 'mpl.sock')
+        patcher = mock.patch('mplcheck.server.manager')
+        self.m_manager = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.server = server.ValidationServer(self.socket_path)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def _request(self, *requests):
+        client = socket.socket(socket.AF_UNIX)
+        client.connect(self.socket_path)
+        stream = client.makefile('rwb')
+        responses = []
+        try:
+            for request in requests:
+                stream.write(request.encode('utf-8') + b'\n')
+                stream.flush()
+                responses.append(json.loads(
+                    stream.readline().decode('utf-8')))
+        finally:
+            stream.close()
+            client.close()
+        return responses
+
+    def test_validate(self):
+        m_mgr = self.m_manager.Manager.return_value
+        m_mgr.validate.return_value = [error.report.E007('Fake!')]
+        request = json.dumps({'package': 'fake', 'select': 'E007,E008',
+                              'ignore': ['W001']})
+        response, = self._request(request)
+        self.assertEqual('fake', response['package'])
+        self.assertEqual(['E007'], [e['code'] for e in response['errors']])
+        self.m_manager.Manager.assert_called_once_with(
+            'fake', cache=None, memory_budget=None)
+        m_mgr.validate.assert_called_once_with(select=['E007', 'E008'],
+                                               ignore=['W001'])
+        self.m_manager.warm_up.assert_called_once_with()
+        m_mgr.pkg.close.assert_called_once_with()
+
+    def test_several_requests(self):
+        m_mgr = self.m_manager.Manager.return_value
+        m_mgr.validate.return_value = []
+        responses = self._request(json.dumps({'package': 'a'}),
+                                  json.dumps({'package': 'b'}))
+        self.assertEqual([{'package': 'a', 'errors': []},
+                          {'package': 'b', 'errors': []}], responses)
+
+    def test_bad_request(self):
+        response, = self._request('junk')
+        self.assertIn('error', response)
+
+    def test_failed_validation(self):
+        self.m_manager.Manager.side_effect = Exception('Broken')
+        response, = self._request(json.dumps({'package': 'fake'}))
+        self.assertEqual({'package': 'fake', 'error': 'Broken'}, response)
@@ -0,0 +1,129 @@
+#    Copyright (c) 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from mplcheck import manager
+from mplcheck import watch
+
+MANIFEST = """Format: MuranoPL/1.0
+Type: Application
+FullName: com.example.Foo
+Name: Foo
+Description: Foo
+Author: Nobody
+Tags: []
+Classes:
+  com.example.Foo: Foo.yaml
+"""
+
+CLASS = """Namespaces:
+  =: com.example
+Name: Foo
+Methods:
+  deploy:
+    Body:
+      - $.foo()
+"""
+
+
+class PackageWatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self._write('manifest.yaml', MANIFEST)
+        self._write('Classes/Foo.yaml', CLASS)
+        self.watcher = watch.PackageWatcher(self.path)
+        self.watcher.validate()
+
+    def _write(self, name, content, mtime=None):
+        path = os.path.join(self.path, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(content)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def _checked_files(self):
+        with mock.patch('mplcheck.manager.run_task',
+                        wraps=manager.run_task) as m_run_task:
+            errors = self.watcher.refresh()
+        return errors, set(c[0][1] for c in m_run_task.call_args_list)
+
+    def test_not_a_directory(self):
+        with mock.patch('mplcheck.pkg_loader.load_package'):
+            self.assertRaises(ValueError, watch.PackageWatcher, self.path)
+
+    def test_nothing_changed(self):
+        errors, files = self._checked_files()
+        self.assertIsNone(errors)
+        self.assertEqual(set(), files)
+
+    def test_changed_file_is_rechecked(self):
+        self._write('Classes/Foo.yaml', CLASS + 'Bad: key\n', mtime=1)
+        errors, files = self._checked_files()
+        self.assertEqual(set(['Classes/Foo.yaml']), files)
+        self.assertIn('W010', [e.code for e in errors])
+
+        self._write('Classes/Foo.yaml', CLASS, mtime=2)
+        errors, files = self._checked_files()
+        self.assertEqual(set(['Classes/Foo.yaml']), files)
+        self.assertNotIn('W010', [e.code for e in errors])
+
+    def test_removed_file_reruns_cross_file_validators(self):
+        os.remove(os.path.join(self.path, 'Classes/Foo.yaml'))
+        errors, files = self._checked_files()
+        self.assertEqual(set(['manifest.yaml']), files)
+        self.assertIn('E050', [e.code for e in errors])
+
+    def test_format_change_revalidates_everything(self):
+        def set_format():
+            self.watcher.pkg.version = '1.3'
+
+        self._write('manifest.yaml',
+                    MANIFEST.replace('MuranoPL/1.0', 'MuranoPL/1.3'),
+                    mtime=1)
+        with mock.patch.object(self.watcher.pkg, 'try_set_format',
+                               side_effect=set_format):
+            errors, files = self._checked_files()
+        self.assertEqual(set(['manifest.yaml', 'Classes/Foo.yaml']),
+                         files)
+        self.assertEqual('1.3', self.watcher.pkg.version)
+
+    def test_only_roots_are_scanned(self):
+        self._write('Resources/scripts/run.sh', 'true\n')
+        with mock.patch.object(self.watcher.pkg, 'stat_files',
+                               wraps=self.watcher.pkg.stat_files) as m_stat:
+            errors, files = self._checked_files()
+        self.assertIsNone(errors)
+        m_stat.assert_called_once_with(
+            ['Classes/', 'UI/', 'manifest.yaml'])
+
+    def test_validators_without_roots(self):
+
+        class FakeValidator(object):
+
+            def files(self):
+                return []
+
+        roots = watch.PackageWatcher._watched_roots
+        self.assertEqual(['manifest.yaml'], roots([object]))
+        self.assertIsNone(roots([object, FakeValidator]))
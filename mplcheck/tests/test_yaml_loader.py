@@ -0,0 +1,87 @@
+#    Copyright (c) 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import pickle
+import unittest
+
+import six
+import yaml
+
+from mplcheck import yaml_loader
+
+DOCUMENT = u"""Name: App
+Methods:
+  deploy:
+    Body:
+      - $.foo(""" + u'x' * 100 + u""")
+      - Return: 1
+"""
+
+
+class Lines(object):
+
+    def __init__(self, buffer):
+        self._lines = buffer.splitlines()
+
+    def line(self, line):
+        if line < len(self._lines):
+            return self._lines[line]
+
+
+def _load(buffer):
+    stream = six.StringIO(buffer)
+    stream.name = 'fake.yaml'
+    stream.yaml_source = yaml_loader.YamlSource('fake.yaml', Lines(buffer))
+    return yaml.load(stream, yaml_loader.YamlLoader)
+
+
+class YamlLoaderTest(unittest.TestCase):
+
+    def test_positions(self):
+        data = _load(DOCUMENT)
+        body = data['Methods']['deploy']['Body']
+        meta = body.__yaml_meta__
+        self.assertEqual('fake.yaml', meta.name)
+        self.assertEqual((4, 6), (meta.line, meta.column))
+        meta = body[0].__yaml_meta__
+        self.assertEqual((4, 8), (meta.line, meta.column))
+        self.assertIs(meta.source, body.__yaml_meta__.source)
+
+    def test_compact(self):
+        data = _load(DOCUMENT)
+        self.assertFalse(hasattr(data, '__dict__'))
+        self.assertFalse(hasattr(data['Methods']['deploy']['Body'],
+                                 '__dict__'))
+        self.assertFalse(hasattr(data.__yaml_meta__, '__dict__'))
+
+    def test_snippet(self):
+        body = _load(DOCUMENT)['Methods']['deploy']['Body']
+        marks = yaml.compose(DOCUMENT, yaml.SafeLoader)
+        node = marks.value[1][1].value[0][1].value[0][1]
+        for value, yaml_node in ((body, node), (body[0], node.value[0])):
+            self.assertEqual(yaml_node.start_mark.get_snippet(),
+                             value.__yaml_meta__.get_snippet())
+
+    def test_pickle(self):
+        data = _load(DOCUMENT)
+        restored = pickle.loads(pickle.dumps(data, 2))
+        self.assertEqual(data, restored)
+        source = restored.__yaml_meta__.source
+        self.assertIsNone(source.file)
+        self.assertIsNone(restored.__yaml_meta__.get_snippet())
+        body = restored['Methods']['deploy']['Body']
+        self.assertIs(source, body[0].__yaml_meta__.source)
+        source.file = Lines(DOCUMENT)
+        self.assertEqual(data.__yaml_meta__.get_snippet(),
+                         restored.__yaml_meta__.get_snippet())
@@ -15,6 +15,7 @@
 import mock
 import unittest
 
+from mplcheck import error
 from mplcheck.validators import base
 
 
@@ -34,7 +35,8 @@ class YamlValidatorTest(unittest.TestCase):
         self.v.add_checker(c)
         errors = self.v.run()
         c.assert_called_once_with({})
-        self.pkg.search_for.assert_called_once_with('***')
+        self.pkg.search_for.assert_called_once_with('***',
+                                                    roots=None)
 
     def test_run_single_with_key_checker(self):
         c = mock.Mock()
@@ -43,7 +45,8 @@ class YamlValidatorTest(unittest.TestCase):
         self.v.add_checker(c, 'key')
         errors = self.v.run()
         c.assert_called_once_with('whatever')
-        self.pkg.search_for.assert_called_once_with('***')
+        self.pkg.search_for.assert_called_once_with('***',
+                                                    roots=None)
 
     def test_two_keys_unknown_key(self):
         c = mock.Mock()
@@ -53,7 +56,8 @@ class YamlValidatorTest(unittest.TestCase):
         self.v.add_checker(c, 'key')
         errors = self.v.run()
         c.assert_called_once_with('whatever')
-        self.pkg.search_for.assert_called_once_with('***')
+        self.pkg.search_for.assert_called_once_with('***',
+                                                    roots=None)
         self.assertIn('Unknown keyword "unknown"', next(errors).message)
 
     def test_missing_required_key(self):
@@ -61,5 +65,29 @@ class YamlValidatorTest(unittest.TestCase):
         self.fmock.yaml.return_value = [{}]
         self.v.add_checker(c, 'key')
         errors = self.v.run()
-        self.pkg.search_for.assert_called_once_with('***')
+        self.pkg.search_for.assert_called_once_with('***',
+                                                    roots=None)
         self.assertIn('Missing required key "key"', next(errors).message)
+
+    def test_filtered_checker_is_skipped(self):
+        c = mock.Mock()
+        c.return_value = None
+        error.emits('E001')(c)
+        self.fmock.yaml.return_value = [{'key': 'whatever'}]
+        self.v.add_checker(c, 'key')
+        self.v.set_code_filter(error.CodeFilter(select=['E002', 'E020']))
+        list(self.v.run())
+        self.assertFalse(c.called)
+        self.v.set_code_filter(error.CodeFilter(select=['E001']))
+        list(self.v.run())
+        c.assert_called_once_with('whatever')
+
+    def test_nothing_to_report(self):
+        c = mock.Mock()
+        error.emits('E001')(c)
+        self.v.add_checker(c, 'key')
+        self.v.set_code_filter(error.CodeFilter(ignore=['E001', 'E020',
+                                                        'W010']))
+        self.assertEqual([], list(self.v.run()))
+        self.assertFalse(self.pkg.search_for.called)
+        self.assertFalse(self.pkg.read.called)
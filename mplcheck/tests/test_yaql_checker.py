@@ -0,0 +1,61 @@
+#    Copyright (c) 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import unittest
+
+import mock
+
+from mplcheck.checkers import yaql_checker
+
+
+class YaqlCheckerTest(unittest.TestCase):
+
+    def test_shared_engine(self):
+        self.assertIs(yaql_checker.get_engine(),
+                      yaql_checker.get_engine())
+        checkers = [yaql_checker.YaqlChecker(), yaql_checker.YaqlChecker()]
+        for checker in checkers:
+            self.assertIsNone(checker._engine)
+            checker._check('$.engine_is_created()')
+        self.assertIs(checkers[0]._engine, checkers[1]._engine)
+        self.assertIsNot(
+            yaql_checker.get_engine(yaql_checker.ENGINE_10_OPTIONS),
+            yaql_checker.get_engine(yaql_checker.ENGINE_12_OPTIONS))
+
+    def test_check(self):
+        checker = yaql_checker.YaqlChecker()
+        self.assertTrue(checker('$.string().notNull()'))
+        self.assertFalse(checker('$.string('))
+
+    def test_results_are_memoized(self):
+        checker = yaql_checker.YaqlChecker()
+        checker('$.memoized()')
+        with mock.patch.object(checker, '_engine') as m_engine:
+            self.assertTrue(checker('$.memoized()'))
+            self.assertFalse(m_engine.called)
+            self.assertTrue(checker('$.not_memoized()'))
+            m_engine.assert_called_once_with('$.not_memoized()')
+
+
+class LRUCacheTest(unittest.TestCase):
+
+    def test_eviction(self):
+        cache = yaql_checker._LRUCache(2)
+        cache.set('a', True)
+        cache.set('b', False)
+        self.assertTrue(cache.get('a'))
+        cache.set('c', True)
+        self.assertIsNone(cache.get('b'))
+        self.assertTrue(cache.get('a'))
+        self.assertFalse(cache.get('b', False))
@@ -19,6 +19,7 @@ import six
 
 from mplcheck import error
 from mplcheck import log
+from mplcheck import profiler
 
 LOG = log.get_logger(__name__)
 
@@ -43,26 +44,53 @@ def format_support(since=None, till=None):
 class BaseValidator(object):
     __metaclass__ = abc.ABCMeta
 
+    # NOTE: results of cross file validators depend on files other than
+    # the one being checked, e.g. on the package listing
+    cross_file = False
+
+    # NOTE: errors are only cached for built-in validators checking files
+    # on their own, results cached for plugins would outlive upgrades
+    cacheable = False
+
+    # NOTE: only files under these roots are listed, so unrelated trees
+    # like Resources/ are never scanned, None stands for the whole package
+    roots = None
+
     def __init__(self, loaded_package, _filter='.*'):
         self._loaded_pkg = loaded_package
         self._filter = _filter
+        self.code_filter = error.CodeFilter()
 
     @abc.abstractmethod
     def _run_single(self, file_):
         pass
 
+    def set_code_filter(self, code_filter):
+        self.code_filter = code_filter
+
+    def _can_report(self):
+        return True
+
+    def files(self):
+        if not self._can_report():
+            return []
+        return list(self._loaded_pkg.search_for(self._filter,
+                                                roots=self.roots))
+
+    def run_file(self, filename):
+        return self._run_single(self._loaded_pkg.read(filename))
+
     def run(self):
         chain_of_suits = []
-        for filename in self._loaded_pkg.search_for(self._filter):
-            file_ = self._loaded_pkg.read(filename)
-            chain_of_suits.append(self._run_single(file_))
+        for filename in self.files():
+            chain_of_suits.append(self.run_file(filename))
         return itertools.chain(*chain_of_suits)
 
+    @error.emits('E040')
     def _valid_string(self, value):
         if not isinstance(value, six.string_types):
-            yield error.report.E040('Value is not a string "{0}"'
-                                    .format(value),
-                                    value)
+            yield error.report.E040('Value is not a string "{0}"', value,
+                                    args=(value,))
 
 
 class YamlValidator(BaseValidator):
@@ -79,13 +107,25 @@ class YamlValidator(BaseValidator):
         elif required:
             checkers['required'] = True
 
+    def _can_report(self):
+        if (self.code_filter.allows(self._unknown_keyword) or
+                self.code_filter('E020')):
+            return True
+        return any(self.code_filter.allows(checker)
+                   for value in six.itervalues(self._checkers)
+                   for checker in value['checkers'])
+
     def _run_single(self, file_):
         multi_documents = file_.yaml()
         reports_chain = []
+        unknown_allowed = self.code_filter.allows(self._unknown_keyword)
+        missing_allowed = self.code_filter('E020')
 
         def run_helper(name, checkers, data):
             for checker in checkers:
-                result = checker(data)
+                if not self.code_filter.allows(checker):
+                    continue
+                result = profiler.call(None, checker, data)
                 if result:
                     reports_chain.append(result)
 
@@ -97,17 +137,21 @@ class YamlValidator(BaseValidator):
                 checkers = self._checkers.get(key)
                 if checkers:
                     run_helper(key, checkers['checkers'], ast[key])
-                else:
+                elif unknown_allowed:
                     reports_chain.append(self._unknown_keyword(key, value))
+            if not missing_allowed:
+                continue
             missing = set(key for key, value in six.iteritems(self._checkers)
                           if value['required']) - set(ast.keys())
             for m in missing:
                 reports_chain.append([error.report.E020('Missing required key '
-                                     '"{0}"'.format(m), m)])
+                                     '"{0}"', m, args=(m,))])
         return itertools.chain(*reports_chain)
 
+    @error.emits('W010')
     def _unknown_keyword(self, key, value):
-        yield error.report.W010('Unknown keyword "{0}"'.format(key), key)
+        yield error.report.W010('Unknown keyword "{0}"', key, args=(key,))
 
+    @error.emits()
     def _null_checker(self, value):
         pass
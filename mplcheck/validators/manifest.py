@@ -16,11 +16,15 @@
 import os.path
 import six
 
+from mplcheck import consts
 from mplcheck import error
 from mplcheck.validators import base
 
 
 class ManifestValidator(base.YamlValidator):
+    cross_file = True
+    roots = (consts.MANIFEST_PATH,)
+
     def __init__(self, loaded_package):
         super(ManifestValidator, self).__init__(loaded_package,
                                                 'manifest.yaml$')
@@ -36,56 +40,62 @@ class ManifestValidator(base.YamlValidator):
         self.add_checker(self._valid_ui, 'UI', False)
         self.add_checker(self._valid_logo, 'Logo', False)
 
+    @error.emits('E030')
     def _valid_format(self, value):
         format_ = str(value).split('/', 1)
         if len(format_) > 1:
             if format_[0] != 'MuranoPL':
-                yield error.report.E030('Not supported format version "{0}"'
-                                        .format(value), value)
+                yield error.report.E030('Not supported format version "{0}"',
+                                        value, args=(value,))
         ver = format_[-1]
         if str(ver) not in ['1.0', '1.1', '1.2', '1.3', '1.4']:
-            yield error.report.E030('Not supported format version "{0}"'
-                                    .format(value), value)
+            yield error.report.E030('Not supported format version "{0}"',
+                                    value, args=(value,))
 
+    @error.emits('E070')
     def _valid_tags(self, value):
         if not isinstance(value, list):
             yield error.report.E070('Tags should be a list', value)
 
+    @error.emits('E005')
     def _valid_require(self, value):
         if not isinstance(value, dict):
             yield error.report.E005('Require is not a dict type', value)
 
+    @error.emits('E071')
     def _valid_type(self, value):
         if value not in ('Application', 'Library'):
-            yield error.report.E071('Type is invalid "{0}"'.format(value),
-                                    value)
+            yield error.report.E071('Type is invalid "{0}"', value,
+                                    args=(value,))
 
+    @error.emits('E072', 'E073')
     def _valid_ui(self, value):
         if isinstance(value, six.string_types):
             if not self._loaded_pkg.exists(os.path.join('UI', value)):
                 yield error.report.E073('There is no UI file mention in '
-                                        'manifest "{0}"'.format(value), value)
+                                        'manifest "{0}"', value, args=(value,))
         else:
             yield error.report.E072('UI is not a filename', value)
 
+    @error.emits('E074')
     def _valid_logo(self, value):
         if isinstance(value, six.string_types):
             if not self._loaded_pkg.exists(value):
                 yield error.report.E074('There is no Logo file mention in '
-                                        'manifest "{0}"'.format(value), value)
+                                        'manifest "{0}"', value, args=(value,))
         else:
             yield error.report.E074('Logo is not a filename', value)
 
+    @error.emits('E050', 'W020')
     def _valid_classes(self, value):
         files = set(value.values())
         existing_files = set(self._loaded_pkg.search_for('.*\.yaml$',
                                                          'Classes'))
         for fname in files - existing_files:
-            yield error.report.E050('File is present in Manfiest {fname}, '
-                                    'but not in filesystem'
-                                    .format(fname=fname),
-                                    fname)
+            yield error.report.E050('File is present in Manfiest {0}, '
+                                    'but not in filesystem', fname,
+                                    args=(fname,))
         for fname in existing_files - files:
             yield error.report.W020('File is not present in Manfiest, but '
-                                    'it is in filesystem: {fname}'
-                                    .format(fname=fname), fname)
+                                    'it is in filesystem: {0}', fname,
+                                    args=(fname,))
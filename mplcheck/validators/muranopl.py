@@ -23,8 +23,15 @@ from mplcheck.validators import base
 
 SUPPORTED_FORMATS = frozenset(['1.0', '1.1', '1.2', '1.3', '1.4'])
 
+BODY_CODES = ('E045',) + code_structure.CODES
+ARGUMENTS_CODES = ('E042', 'E046', 'E048', 'E052', 'E053')
+METHODS_CODES = ('E044', 'W045') + ARGUMENTS_CODES + BODY_CODES
+
 
 class MuranoPLValidator(base.YamlValidator):
+    roots = ('Classes/',)
+    cacheable = True
+
     def __init__(self, loaded_package):
         super(MuranoPLValidator, self).__init__(loaded_package,
                                                 'Classes/.*\.yaml$')
@@ -37,15 +44,21 @@ class MuranoPLValidator(base.YamlValidator):
         self.add_checker(self._valid_namespaces, 'Namespaces', False)
         self.add_checker(self._valid_properties, 'Properties', False)
 
+    def set_code_filter(self, code_filter):
+        super(MuranoPLValidator, self).set_code_filter(code_filter)
+        self.code_structure.code_filter = code_filter
+
+    @error.emits('E011', 'W011')
     def _valid_name(self, value):
         if value.startswith('__') or \
            not re.match('[a-zA-Z_][a-zA-Z0-9_]*', value):
-            yield error.report.E011('Invalid class name "{0}"'.format(value),
-                                    value)
+            yield error.report.E011('Invalid class name "{0}"', value,
+                                    args=(value,))
         if not (value != value.lower() and value != value.upper()):
-            yield error.report.W011('Invalid class name "{0}"'.format(value),
-                                    value)
+            yield error.report.W011('Invalid class name "{0}"', value,
+                                    args=(value,))
 
+    @error.emits('E024')
     def _valid_extends(self, value):
         if isinstance(value, list):
             for cls in value:
@@ -54,6 +67,7 @@ class MuranoPLValidator(base.YamlValidator):
         elif not isinstance(value, six.string_types):
             yield error.report.E024("Wrong Extended Class type", value)
 
+    @error.emits('E042', 'E048')
     def _valid_contract(self, contract):
         if isinstance(contract, list):
             if len(contract) > 1:
@@ -62,19 +76,20 @@ class MuranoPLValidator(base.YamlValidator):
             elif len(contract) == 1:
                 contract = contract[0]
                 if not self.yaql_checker(contract):
-                    yield error.report.E048('Contract is not valid yaql "{0}"'
-                            .format(contract), contract)
+                    yield error.report.E048('Contract is not valid yaql "{0}"',
+                                            contract, args=(contract,))
         elif isinstance(contract, dict):
             for c_key, c_value in six.iteritems(contract):
                 yield self._valid_contract(c_value)
         elif isinstance(contract, six.string_types):
             if not self.yaql_checker(contract):
-                yield error.report.E048('Contract is not valid yaql "{0}"'
-                                        .format(contract), contract)
+                yield error.report.E048('Contract is not valid yaql "{0}"',
+                                        contract, args=(contract,))
         else:
-            yield error.report.E048('Contract is not valid yaql "{0}"'
-                                    .format(contract), contract)
+            yield error.report.E048('Contract is not valid yaql "{0}"',
+                                    contract, args=(contract,))
 
+    @error.emits('E042', 'E047', 'E048')
     def _valid_properties(self, value):
         usage_allowed = frozenset(['In', 'Out', 'InOut', 'Const', 'Static',
                                   'Runtime'])
@@ -83,19 +98,21 @@ class MuranoPLValidator(base.YamlValidator):
             if usage:
                 if usage not in usage_allowed:
                     yield error.report.E042('Not allowed usage '
-                                            '"{0}"'.format(usage),
-                                            usage)
+                                            '"{0}"', usage, args=(usage,))
             contract = values.get('Contract')
             if contract:
-                yield self._valid_contract(contract)
+                if self.code_filter.allows(self._valid_contract):
+                    yield self._valid_contract(contract)
             else:
-                yield error.report.E047('Missing Contract in property "{0}"'
-                                        .format(property_), property_)
+                yield error.report.E047('Missing Contract in property "{0}"',
+                                        property_, args=(property_,))
 
+    @error.emits('E044')
     def _valid_namespaces(self, value):
         if not isinstance(value, dict):
             yield error.report.E044('Wrong type of namespace', value)
 
+    @error.emits(*METHODS_CODES)
     def _valid_methods(self, value):
         for method_name, method_data in six.iteritems(value):
             if not isinstance(method_data, dict):
@@ -104,18 +121,19 @@ class MuranoPLValidator(base.YamlValidator):
                 return
 
             scope = method_data.get('Scope')
-            if scope:
+            if scope and self.code_filter.allows(self._valid_scope):
                 yield self._valid_scope(scope)
             usage = method_data.get('Usage')
-            if usage:
+            if usage and self.code_filter.allows(self._valid_method_usage):
                 yield self._valid_method_usage(usage)
             arguments = method_data.get('Arguments')
-            if arguments:
+            if arguments and self.code_filter.allows(self._valid_arguments):
                 yield self._valid_arguments(arguments)
             body = method_data.get('Body')
-            if body:
+            if body and self.code_filter.allows(self._valid_body):
                 yield self._valid_body(body)
 
+    @error.emits(*BODY_CODES)
     def _valid_body(self, body):
         if not isinstance(body, (list, six.string_types, dict)):
             yield error.report.E045('Body is not a list or scalar/yaql '
@@ -123,28 +141,31 @@ class MuranoPLValidator(base.YamlValidator):
         else:
             yield self.code_structure.codeblock(body)
 
+    @error.emits('E044')
     def _valid_scope(self, scope):
         if self._loaded_pkg.format >= '1.4':
             if scope is not None and scope not in ('Public', 'Session'):
-                yield error.report.E044('Wrong Scope "{0}"'.format(scope),
-                                        scope)
+                yield error.report.E044('Wrong Scope "{0}"', scope,
+                                        args=(scope,))
         else:
             yield error.report.E044('Scope is not supported version '
                                     'earlier than 1.3"', scope)
 
+    @error.emits('W045')
     def _valid_method_usage(self, usage):
         if usage == 'Action':
             if self._loaded_pkg.format >= '1.4':
-                yield error.report.W045('Usage "{0}" is deprecated since 1.4'
-                                        .format(usage), usage)
+                yield error.report.W045('Usage "{0}" is deprecated since 1.4',
+                                        usage, args=(usage,))
         elif usage in frozenset(['Static', 'Extension']):
             if self._loaded_pkg.format <= '1.3':
-                yield error.report.W045('Usage "{0}" is available from 1.3'
-                                        .format(usage), usage)
+                yield error.report.W045('Usage "{0}" is available from 1.3',
+                                        usage, args=(usage,))
         elif usage != 'Runtime':
-            yield error.report.W045('Unsupported usage type "{0}" '
-                                    .format(usage), usage)
+            yield error.report.W045('Unsupported usage type "{0}" ', usage,
+                                    args=(usage,))
 
+    @error.emits(*ARGUMENTS_CODES)
     def _valid_arguments(self, arguments):
         if not isinstance(arguments, list):
             yield error.report.E046('Methods arguments should be a list',
@@ -157,17 +178,19 @@ class MuranoPLValidator(base.YamlValidator):
             else:
                 val = argument.values()[0]
                 contract = val.get('Contract')
-                if contract:
+                if contract and self.code_filter.allows(self._valid_contract):
                     yield self._valid_contract(contract)
                 usage = val.get('Usage')
-                if usage:
+                if (usage and
+                        self.code_filter.allows(self._valid_argument_usage)):
                     yield self._valid_argument_usage(usage)
 
+    @error.emits('E052', 'E053')
     def _valid_argument_usage(self, usage):
         if self._loaded_pkg.format < '1.4':
             yield error.report.E052('Arguments usage is available since 1.4 ',
                                     usage)
         if usage not in frozenset(['Standard', 'VarArgs', 'KwArgs']):
-            yield error.report.E053('Usage is invalid value "{0}"'
-                                    .format(usage), usage)
+            yield error.report.E053('Usage is invalid value "{0}"', usage,
+                                    args=(usage,))
 
@@ -24,6 +24,9 @@ FIELDS_TYPE = frozenset(['string', 'boolean', 'text', 'integer', 'password',
 
 
 class UiValidator(base.YamlValidator):
+    roots = ('UI/',)
+    cacheable = True
+
     def __init__(self, loaded_package):
         super(UiValidator, self).__init__(loaded_package, 'UI/.*\.yaml$')
         self.add_checker(self._validate_forms, 'Forms', False)
@@ -31,27 +34,29 @@ class UiValidator(base.YamlValidator):
         self.add_checker(self._null_checker, 'Application', False)
         self.add_checker(self._null_checker, 'Version', False)
 
+    @error.emits('E040', 'E080', 'E081')
     def _validate_forms(self, forms):
         for named_form in forms:
             for name, form in six.iteritems(named_form):
                 yield self._valid_form(form['fields'])
 
+    @error.emits('E040', 'E080', 'E081')
     def _valid_form(self, form):
         for named_params in form:
             for key, value in six.iteritems(named_params):
                 if key == 'type':
                     if value not in FIELDS_TYPE:
-                        yield error.report.E080('Wrong type of field "{0}"'
-                                                .format(value), value)
+                        yield error.report.E080('Wrong type of field "{0}"',
+                                                value, args=(value,))
                 elif key == 'required':
                     if not isinstance(value, bool):
                         yield error.report.E081('Value of {0} should be '
-                                                'boolean not "{1}"'
-                                                .format(key, value), key)
+                                                'boolean not "{1}"', key,
+                                                args=(key, value))
                 elif key == 'hidden':
                     if not isinstance(value, bool):
                         yield error.report.E081('Value of {0} should be '
-                                                'boolean "{1}"'
-                                                .format(key, value), key)
+                                                'boolean "{1}"', key,
+                                                args=(key, value))
                 else:
                     yield self._valid_string(value)
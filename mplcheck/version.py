@@ -0,0 +1,88 @@
+#    Copyright (c) 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import hashlib
+import os
+
+
+class _LazyVersionInfo(object):
+    # NOTE: importing pbr is slow, so it is deferred until a version is
+    # actually needed
+
+    def __init__(self, package):
+        self._package = package
+        self._info = None
+
+    def __getattr__(self, name):
+        if self._info is None:
+            import pbr.version
+            self._info = pbr.version.VersionInfo(self._package)
+        return getattr(self._info, name)
+
+
+version_info = _LazyVersionInfo('mpl-checker')
+
+
+_SOURCE_FINGERPRINT = None
+_DISTRIBUTION_VERSIONS = {}
+
+
+def _fingerprint(root):
+    digest = hashlib.sha1()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if not filename.endswith('.py'):
+                continue
+            path = os.path.join(dirpath, filename)
+            relpath = os.path.relpath(path, root).replace(os.sep, '/')
+            digest.update(relpath.encode('utf-8') + b'\0')
+            with open(path, 'rb') as source:
+                digest.update(hashlib.sha1(source.read()).digest())
+    return digest.hexdigest()
+
+
+def source_fingerprint():
+    """Identifies the installed mplcheck code
+
+    Unlike the version, which takes pbr a long time to find, it is cheap
+    to compute and also changes when the code is edited in place. Only
+    contents of the sources are hashed, so every install of the same
+    code, e.g. in a fresh virtualenv, has the same fingerprint.
+    """
+    global _SOURCE_FINGERPRINT
+    if _SOURCE_FINGERPRINT is None:
+        _SOURCE_FINGERPRINT = _fingerprint(
+            os.path.dirname(os.path.abspath(__file__)))
+    return _SOURCE_FINGERPRINT
+
+
+def distribution_version(name):
+    """Installed version of a distribution, None when it is missing"""
+    if name not in _DISTRIBUTION_VERSIONS:
+        try:
+            from importlib import metadata
+        except ImportError:
+            import pkg_resources
+            try:
+                found = pkg_resources.get_distribution(name).version
+            except pkg_resources.DistributionNotFound:
+                found = None
+        else:
+            try:
+                found = metadata.version(name)
+            except metadata.PackageNotFoundError:
+                found = None
+        _DISTRIBUTION_VERSIONS[name] = found
+    return _DISTRIBUTION_VERSIONS[name]
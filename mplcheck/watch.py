@@ -0,0 +1,149 @@
+#    Copyright (c) 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+from mplcheck import consts
+from mplcheck import log
+from mplcheck import manager
+from mplcheck import pkg_loader
+
+LOG = log.get_logger(__name__)
+
+DEFAULT_INTERVAL = 1.0
+
+
+class PackageWatcher(object):
+    """Keeps results for a package directory up to date with its files
+
+    Results are stored per validator and file. When files change only
+    those files are read and checked again. Cross file validators are
+    rerun whenever the package listing changes. Only the manifest and
+    the roots of validators are scanned for changes.
+    """
+
+    def __init__(self, pkg_path, select=None, ignore=None, cache=None,
+                 memory_budget=None):
+        self.manager = manager.Manager(pkg_path, cache=cache,
+                                       memory_budget=memory_budget)
+        if not isinstance(self.manager.pkg, pkg_loader.DirectoryLoader):
+            raise ValueError('Only package directories can be watched')
+        self.manager.load_plugins()
+        self.select = select
+        self.ignore = ignore
+        self._roots = self._watched_roots(self.manager.validators)
+        self._snapshot = self._scan()
+        self._validators = []
+        self._files = {}
+        self._results = {}
+
+    @property
+    def pkg(self):
+        return self.manager.pkg
+
+    @staticmethod
+    def _watched_roots(validators):
+        roots = set([consts.MANIFEST_PATH])
+        for validator in validators:
+            if getattr(validator, 'files', None) is None:
+                continue
+            validator_roots = getattr(validator, 'roots', None)
+            if validator_roots is None:
+                return None
+            roots.update(validator_roots)
+        return sorted(roots)
+
+    def _scan(self):
+        # NOTE: files removed while they are scanned have no stat data
+        return dict((name, stat)
+                    for name, stat in self.pkg.stat_files(self._roots)
+                    if stat is not None)
+
+    @staticmethod
+    def _list_files(v):
+        files = getattr(v, 'files', None)
+        if files is None:
+            return [None]
+        return files()
+
+    def _run(self, v, filename):
+        self._results[(v, filename)] = list(self.manager._flatten(
+            self.manager.run_cached(v, filename, self.select, self.ignore),
+            self.select, self.ignore))
+
+    def errors(self):
+        errors = []
+        for v in self._validators:
+            for filename in self._files[v]:
+                errors.extend(self._results[(v, filename)])
+        return errors
+
+    def validate(self):
+        self._validators = self.manager.create_validators(
+            select=self.select, ignore=self.ignore)
+        self._files = {}
+        self._results = {}
+        for v in self._validators:
+            self._files[v] = self._list_files(v)
+            for filename in self._files[v]:
+                self._run(v, filename)
+        return self.errors()
+
+    def refresh(self):
+        """Revalidate changed files, returns None if nothing changed"""
+        snapshot = self._scan()
+        touched = set(path for path, stat in snapshot.items()
+                      if self._snapshot.get(path) != stat)
+        touched.update(set(self._snapshot) - set(snapshot))
+        if not touched:
+            return None
+        listing_changed = set(snapshot) != set(self._snapshot)
+        self._snapshot = snapshot
+        self.pkg.invalidate(touched)
+
+        if consts.MANIFEST_PATH in touched:
+            format_ = (self.pkg.format, self.pkg.version)
+            self.pkg.format = consts.DEFAULT_FORMAT
+            self.pkg.version = consts.DEFAULT_VERSION
+            self.pkg.try_set_format()
+            if format_ != (self.pkg.format, self.pkg.version):
+                return self.validate()
+
+        for v in self._validators:
+            old_files = self._files[v]
+            if listing_changed:
+                self._files[v] = self._list_files(v)
+            for filename in set(old_files) - set(self._files[v]):
+                del self._results[(v, filename)]
+            rerun_all = getattr(v, 'cross_file', False) and listing_changed
+            for filename in self._files[v]:
+                if (rerun_all or filename is None or filename in touched or
+                        (v, filename) not in self._results):
+                    self._run(v, filename)
+        return self.errors()
+
+    def close(self):
+        self.pkg.close()
+
+    def watch(self, interval=DEFAULT_INTERVAL):
+        """Yields the errors of the package every time it changes"""
+        try:
+            yield self.validate()
+            while True:
+                time.sleep(interval)
+                errors = self.refresh()
+                if errors is not None:
+                    yield errors
+        finally:
+            self.close()
@@ -13,41 +13,147 @@
 #    under the License.
 
 
+import six
 import yaml
 
 __all__ = ['YamlLoader']
 
 
+COLUMN_BITS = 20
+MAX_COLUMN = (1 << COLUMN_BITS) - 1
+
+
+class YamlSource(object):
+    """File shared by metadata of all nodes parsed from it
+
+    file provides text of lines by number, e.g. a FileWrapper. It is not
+    pickled and is set again once parsed documents are taken from the
+    cache.
+    """
+    __slots__ = ('name', 'file')
+
+    def __init__(self, name, file_=None):
+        self.name = name
+        self.file = file_
+
+    def __getstate__(self):
+        return self.name
+
+    def __setstate__(self, state):
+        self.name = state
+        self.file = None
+
+    def get_snippet(self, line, column, indent=4, max_length=75):
+        if self.file is None:
+            return None
+        return get_snippet(self.file, line, column, indent, max_length)
+
+
+def get_snippet(lines, line, column, indent=4, max_length=75):
+    """Renders a line of a file pointing at a column
+
+    lines provides text of lines by number.
+    """
+    # NOTE: mirrors yaml.Mark.get_snippet
+    text = lines.line(line)
+    if text is None:
+        return None
+    column = min(column, len(text))
+    head = ''
+    start = column
+    while start > 0 and text[start - 1] != u'\0':
+        start -= 1
+        if column - start > max_length / 2 - 1:
+            head = ' ... '
+            start += 5
+            break
+    tail = ''
+    end = column
+    while end < len(text) and text[end] != u'\0':
+        end += 1
+        if end - column > max_length / 2 - 1:
+            tail = ' ... '
+            end -= 5
+            break
+    return (' ' * indent + head + text[start:end] + tail + '\n' +
+            ' ' * (indent + column - start + len(head)) + '^')
+
+
 class YamlMetadata(object):
-    def __init__(self, mark):
-        self.mark = mark
+    """Position of a node, line and column are packed into one integer"""
+    __slots__ = ('source', 'position')
+
+    def __init__(self, source, line, column):
+        self.source = source
+        self.position = line << COLUMN_BITS | min(column, MAX_COLUMN)
+
+    def __reduce__(self):
+        return _metadata, (self.source, self.position)
+
+    @property
+    def name(self):
+        return self.source.name
 
     @property
     def line(self):
-        return self.mark.line
+        return self.position >> COLUMN_BITS
 
     @property
     def column(self):
-        return self.mark.column
+        return self.position & MAX_COLUMN
 
     def get_snippet(self, indent=4, max_length=75):
-        return self.mark.get_snippet(indent, max_length)
+        return self.source.get_snippet(self.line, self.column,
+                                       indent, max_length)
+
+    def lines(self):
+        """Returns lines of the file, without its content when possible"""
+        file_ = self.source.file
+        ref = getattr(file_, 'ref', None)
+        if ref is None:
+            return file_
+        return ref()
+
 
+def _metadata(source, position):
+    meta = YamlMetadata.__new__(YamlMetadata)
+    meta.source = source
+    meta.position = position
+    return meta
+
+
+# NOTE: parsed files are sent between processes, so nodes are pickled
+# without the generic per instance state dictionaries
 
 class YamlObject(object):
-    pass
+    __slots__ = ()
+
+    def __setstate__(self, meta):
+        self.__yaml_meta__ = meta
 
 
 class YamlMapping(YamlObject, dict):
-    pass
+    __slots__ = ('__yaml_meta__',)
+
+    def __reduce__(self):
+        return (YamlMapping, (), getattr(self, '__yaml_meta__', None),
+                None, six.iteritems(self))
 
 
 class YamlSequence(YamlObject, list):
-    pass
+    __slots__ = ('__yaml_meta__',)
 
+    def __reduce__(self):
+        return (YamlSequence, (), getattr(self, '__yaml_meta__', None),
+                iter(self))
 
-class YamlString(YamlObject, bytes):
-    pass
+
+# NOTE: str subclasses cannot have non-empty __slots__
+class YamlString(YamlObject, str):
+
+    def __reduce__(self):
+        return (YamlString, (str(self),),
+                getattr(self, '__yaml_meta__', None))
 
 
 BaseLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
@@ -55,16 +161,26 @@ BaseLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
 
 class YamlLoader(BaseLoader):
 
+    def __init__(self, stream):
+        super(YamlLoader, self).__init__(stream)
+        self.source = getattr(stream, 'yaml_source', None)
+        if self.source is None:
+            self.source = YamlSource(getattr(stream, 'name', None))
+
+    def _meta(self, node):
+        mark = node.start_mark
+        return YamlMetadata(self.source, mark.line, mark.column)
+
     def construct_yaml_seq(self, node):
         data = YamlSequence()
         yield data
         data.extend(self.construct_sequence(node))
-        data.__yaml_meta__ = node.start_mark
+        data.__yaml_meta__ = self._meta(node)
 
     def construct_yaml_str(self, node):
         value = super(YamlLoader, self).construct_yaml_str(node)
         value = YamlString(value)
-        value.__yaml_meta__ = node.start_mark
+        value.__yaml_meta__ = self._meta(node)
         return value
 
     def construct_yaml_map(self, node):
@@ -72,7 +188,7 @@ class YamlLoader(BaseLoader):
         yield data
         value = self.construct_mapping(node)
         data.update(value)
-        data.__yaml_meta__ = node.start_mark
+        data.__yaml_meta__ = self._meta(node)
 
 YamlLoader.add_constructor(
     u'tag:yaml.org,2002:seq',